@@ -37,6 +37,12 @@ setup(
             "black>=22.0.0,<23.0.0",
             "isort>=5.0.0,<6.0.0",
         ],
+        "speedups": [
+            "orjson>=3.0.0",
+        ],
+        "jsonschema": [
+            "fastjsonschema>=2.15.0",
+        ],
         "docs": [
             "sphinx>=4.0.0,<5.0.0",
             "sphinx-rtd-theme>=1.0.0,<2.0.0",
@@ -1,3 +1,5 @@
+import decimal
+import json
 import os
 import pytest
 from zenithdb import Database, Query
@@ -32,11 +34,95 @@ def test_document_validation(db):
         users.insert({"name": "John", "age": -1})
     
     # Test bulk insert with validation
+    docs = [
+        {"name": "Alice", "age": 25},
+        {"name": "Bob", "age": -5}
+    ]
     with pytest.raises(ValueError):
-        users.insert_many([
-            {"name": "Alice", "age": 25},
-            {"name": "Bob", "age": -5}
-        ])
+        users.insert_many(docs)
+    assert users.count() == 1
+    # A rejected batch does not hand out ids for documents that were never stored
+    assert all("_id" not in doc for doc in docs)
+
+def test_schema_validation(db):
+    """Test compiled schema validators."""
+    users = db.collection("users")
+    users.set_validator({"age": {"type": int, "min": 0}, "name": {"type": str, "required": False}})
+    
+    assert users.insert({"name": "John", "age": 30}) is not None
+    assert users.insert({"age": 0}) is not None
+    
+    with pytest.raises(ValueError):
+        users.insert({"name": "John", "age": -1})
+    with pytest.raises(ValueError):
+        users.insert({"name": "John", "age": "30"})
+    with pytest.raises(ValueError):
+        users.insert({"name": "John"})
+    with pytest.raises(ValueError):
+        users.insert_many([{"age": 25}, {"age": 5, "name": 7}])
+    
+    # Detailed mode names the failing rule
+    users.set_validator({"age": {"type": int, "max": 120}}, fast=False)
+    with pytest.raises(ValueError, match="'age' must be <= 120"):
+        users.insert({"age": 200})
+    
+    # Schema is restored when the collection is reopened
+    db._collections.clear()
+    with pytest.raises(ValueError):
+        db.collection("users").insert({"age": "old"})
+    
+    # Values that cannot be compared fail validation instead of raising TypeError,
+    # and ints are accepted where floats are expected
+    for fast in (True, False):
+        users.set_validator({"age": {"min": 0}, "score": {"type": float, "max": 10, "required": False}}, fast=fast)
+        with pytest.raises(ValueError, match="failed validation"):
+            users.insert({"age": "x"})
+        assert users.insert({"age": 1, "score": 3}) is not None
+        assert users.insert({"age": 1, "score": 2.5}) is not None
+        with pytest.raises(ValueError, match="failed validation"):
+            users.insert({"age": 1, "score": True})
+    
+    # Types that cannot be restored are rejected before anything is stored
+    with pytest.raises(ValueError, match="Unsupported type"):
+        db.collection("users").set_validator({"price": {"type": decimal.Decimal}})
+    reopened = Database(db.db_path)
+    try:
+        with pytest.raises(ValueError, match="'score' must be of type float"):
+            reopened.collection("users").insert({"age": 1, "score": "high"})
+    finally:
+        reopened.close()
+
+def test_vectorized_validation(db):
+    """Test validators that check a whole batch of documents in one call."""
+    users = db.collection("users")
+    calls = []
+    
+    def ages_valid(docs):
+        calls.append(len(docs))
+        return [isinstance(doc.get("age"), int) for doc in docs]
+    
+    users.set_validator(ages_valid, vectorized=True)
+    users.insert_many([{"age": 1}, {"age": 2}, {"age": 3}])
+    assert calls == [3]
+    
+    with pytest.raises(ValueError):
+        users.insert_many([{"age": 4}, {"age": "5"}])
+    with pytest.raises(ValueError):
+        users.insert({"age": None})
+    assert users.count() == 3
+
+def test_print_collection(db, capsys):
+    """Test that raw and pretty collection dumps are both valid JSON."""
+    users = db.collection("users")
+    users.insert_many([{"name": "Zoë", "tags": ["a"]}, {"name": "Bob"}])
+    db.create_index("users", "name")
+    
+    for pretty in (False, True):
+        users.print_collection(pretty=pretty)
+        dump = json.loads(capsys.readouterr().out)
+        assert dump["name"] == "users"
+        assert sorted(doc["name"] for doc in dump["documents"]) == ["Bob", "Zoë"]
+        assert dump["indexes"] == [["name"]]
 
 def test_get_all(db):
     users = db.collection("users")
@@ -49,6 +135,12 @@ def test_get_all(db):
             "address": {"city": "London", "country": "UK"}
         })
     assert len(users.all()) == 14
+    assert len(users.find({})) == len(users.find()) == users.count({}) == 14
+    assert users.find_one()["email"] == "alice@example.com"
+    assert [doc["age"] for doc in users.all(limit=3, skip=1, sort={"age": "desc"})] == [32, 31, 30]
+    assert users.all(limit=1, sort={"age": "asc"})[0]["age"] == 20
+    with pytest.raises(ValueError):
+        users.all(sort={"age": "up"})
     users.delete_many({})
     assert len(users.all()) == 0
 
@@ -105,6 +197,61 @@ def test_complex_updates(db):
     updated = users.find_one({"_id": user_id})
     assert updated["profile"]["age"] == 31
     assert updated["tags"][0] == "c"
+    
+    # Test update operators, new nested objects and numeric object keys
+    users.update(
+        {"_id": user_id},
+        {"$inc": {"profile.score": 5}, "$unset": {"tags": ""},
+         "$set": {"settings.theme": {"dark": True}, "profile.ranks.1": "gold"}}
+    )
+    
+    updated = users.find_one({"_id": user_id})
+    assert updated["profile"]["score"] == 105
+    assert "tags" not in updated
+    assert updated["settings"] == {"theme": {"dark": True}}
+    assert updated["profile"]["ranks"] == {"1": "gold"}
+    
+    # Scalars bound directly keep their JSON types
+    users.update(
+        {"_id": user_id},
+        {"$set": {"nick": 'J "Doe"', "active": True, "rating": 4.5, "manager": None, "count": 0}}
+    )
+    
+    updated = users.find_one({"_id": user_id})
+    assert updated["nick"] == 'J "Doe"'
+    assert updated["active"] is True
+    assert updated["rating"] == 4.5
+    assert updated["manager"] is None and "manager" in updated
+    assert updated["count"] == 0
+    
+    # String values in update and delete queries match stored strings
+    assert users.update({"name": "John", "nick": {"$ne": "Jane"}}, {"$set": {"seen": True}}) == 1
+    assert users.find_one({"_id": user_id})["seen"] is True
+    assert users.delete({"name": "Jane"}) == 0
+    
+    # $contains terms match stored text, whatever their type or characters
+    users.update({"_id": user_id}, {"$set": {"city": "Zürich", "scores": [5, 7]}})
+    assert users.update({"city": {"$contains": "ürich"}}, {"$set": {"swiss": True}}) == 1
+    assert users.delete({"scores": {"$contains": 6}}) == 0
+    assert users.delete({"name": "John"}) == 1
+
+def test_unsupported_operators(db):
+    """Test that operators without a translation are rejected rather than ignored."""
+    users = db.collection("users")
+    users.insert_many([{"name": "John", "age": 30}, {"name": "Jane", "age": 25}])
+    
+    q = Query()
+    with pytest.raises(ValueError, match="Unsupported query operator"):
+        users.update(q.age.between(20, 26), {"$set": {"young": True}})
+    with pytest.raises(ValueError, match="Unsupported query operator"):
+        users.delete({"name": {"$regex": "^J"}})
+    with pytest.raises(ValueError, match="Unsupported query operator"):
+        users.find({"age": {"$between": [20, 26]}})
+    assert users.count({"young": True}) == 0
+    assert users.count() == 2
+    
+    assert users.update({"name": {"$eq": "Jane"}}, {"$set": {"young": True}}) == 1
+    assert users.find_one({"young": True})["name"] == "Jane"
 
 def test_full_text_search(db):
     """Test full text search."""
@@ -113,4 +260,41 @@ def test_full_text_search(db):
     users.insert({"name":"Jane Doe","age":25,"email":"jane@example.com","tags":["customer","trial"]})
     assert len(users.find({"*":{"$contains":"Smith"}})) == 1
     assert len(users.find({"*":{"$contains":"Doe"}})) == 1
-    assert len(users.find({"*":{"$contains":"Smith Doe"}})) == 0
\ No newline at end of file
+    assert len(users.find({"*":{"$contains":"Smith Doe"}})) == 0    
+    # Terms that cannot be pre-filtered in SQL and values in nested containers
+    users.insert({"name": "Zoë Ångström", "profile": {"langs": [{"name": "Rust"}]}})
+    assert len(users.find({"*": {"$contains": "ÅNGSTRÖM"}})) == 1
+    assert len(users.find({"*": {"$contains": 'ë "'}})) == 0
+    assert len(users.find({"*": {"$contains": "rust"}})) == 1
+    
+    # Only values match, booleans by their JSON names
+    users.insert({"name": "Flag", "active": True})
+    assert users.find({"*": {"$contains": "email"}}) == []
+    assert [doc["name"] for doc in users.find({"*": {"$contains": "TRUE"}})] == ["Flag"]
+    assert len(users.find({"*": {"$contains": "example"}, "age": {"$gt": 26}})) == 1
+
+def test_json_schema_validation(db):
+    """Test JSON Schema validators compiled with fastjsonschema."""
+    pytest.importorskip("fastjsonschema")
+    users = db.collection("users")
+    users.set_schema({
+        "type": "object",
+        "properties": {"age": {"type": "integer", "minimum": 0}, "role": {"default": "user"}},
+        "required": ["age"]
+    })
+    
+    doc = {"age": 30}
+    users.insert(doc)
+    assert "role" not in doc
+    with pytest.raises(ValueError):
+        users.insert_many([{"age": 1}, {"age": -1}])
+    
+    users.set_schema({"required": ["name"]}, fast=False)
+    with pytest.raises(ValueError, match="name"):
+        users.insert({"age": 1})
+    
+    # Schema is restored when the collection is reopened
+    db._collections.clear()
+    with pytest.raises(ValueError):
+        db.collection("users").insert({"age": 1})
+    assert db.collection("users").count() == 1
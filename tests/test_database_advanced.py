@@ -52,6 +52,95 @@ def test_index_operations(db):
     # Test invalid index
     with pytest.raises(sqlite3.OperationalError):
         db.create_index("users", "invalid[]")
+    
+    # Collection names cannot inject SQL into index DDL
+    with pytest.raises(sqlite3.OperationalError):
+        db.create_index("users' OR 1=1; DROP TABLE documents; --", "age")
+    db.collection("users").insert({"age": 1})
+    assert db.collection("users").count() == 1
+
+def test_substring_index(db):
+    """Test that $contains uses a trigram index without changing its results."""
+    users = db.collection("users")
+    users.insert_many([
+        {"name": "John", "bio": "Python developer", "tags": ["premium", "beta"]},
+        {"name": "Jane", "bio": "Designer", "tags": ["premium-plus"]},
+        {"name": "Joe", "bio": 'Says "hi" a lot', "tags": []}
+    ])
+    expected = {
+        ("bio", "THON"): ["John"], ("bio", "sign"): ["Jane"], ("bio", "er"): ["Jane", "John"],
+        ("bio", '"hi"'): ["Joe"], ("tags", "premium"): ["John"], ("tags", "prem"): [],
+    }
+    names = lambda field, term: sorted(doc["name"] for doc in users.find({field: {"$contains": term}}))
+    before = {key: names(*key) for key in expected}
+    assert before == expected
+    
+    name = db.create_index("users", ["bio", "tags"], index_type="fts")
+    assert {"name": name, "type": "fts"}.items() <= db.list_indexes("users")[0].items()
+    assert {key: names(*key) for key in expected} == expected
+    assert users.count({"bio": {"$contains": "developer"}}) == 1
+    
+    # Triggers find index rows by rowid rather than scanning the table,
+    # and creating the index again does not copy the documents twice
+    assert db.create_index("users", ["bio", "tags"], index_type="fts") == name
+    with db.pool.get_connection() as conn:
+        assert conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0] == 3
+        for suffix in ("_update", "_delete"):
+            trigger = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", [name + suffix]).fetchone()[0]
+            assert "WHERE rowid = old.rowid" in trigger
+        plan = conn.execute(f'EXPLAIN QUERY PLAN DELETE FROM "{name}" WHERE rowid = ?', [1]).fetchone()[-1]
+        assert plan.endswith("=")
+    
+    # The index follows later writes, and queries stop using it once dropped
+    users.insert({"name": "Ann", "bio": "Data scientist"})
+    john = users.find_one({"name": "John"})
+    assert users.update({"_id": john["_id"]}, {"$set": {"bio": "Rust developer"}}) == 1
+    assert names("bio", "scien") == ["Ann"]
+    assert names("bio", "python") == []
+    
+    # Updates and deletes use the index for $contains as well
+    assert users.update({"bio": {"$contains": "SIGN"}}, {"$set": {"team": "design"}}) == 1
+    assert users.find_one({"name": "Jane"})["team"] == "design"
+    assert users.delete({"bio": {"$contains": "scien"}}) == 1
+    assert any("MATCH" in sql for sql in db._plan_cache.values() if sql.startswith("DELETE"))
+    db.drop_index(name)
+    assert names("bio", "rust") == ["John"]
+
+def test_update_with_text_index(db):
+    """Test that updates through a trigram index keep the index rows cheap to replace."""
+    import time
+    users = db.collection("users")
+    users.insert_many([{"n": i, "bio": f"bio text {i}", "tag": f"t{i}"} for i in range(5000)])
+    name = db.create_index("users", "bio", index_type="fts")
+    db.create_index("users", "tag", index_type="fts")
+    
+    start_time = time.time()
+    assert users.update({"bio": {"$contains": "text 1"}}, {"$set": {"bio": "changed"}}) == 1111
+    assert time.time() - start_time < 1.0, "Update through a text index took too long"
+    
+    # The filter reads the trigram index instead of scanning the documents
+    sql = next(sql for sql in db._plan_cache.values() if sql.startswith("UPDATE"))
+    with db.pool.get_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", ["x"] * sql.count("?")))
+    assert f"SCAN {name} VIRTUAL TABLE" in plan
+    assert users.count({"bio": {"$contains": "changed"}}) == 1111
+    assert users.count({"bio": {"$contains": "text 1"}}) == 0
+
+def test_contains_matches_across_operations(db):
+    """Test that find, update and delete agree on which documents $contains matches."""
+    users = db.collection("users")
+    users.insert_many([
+        {"name": "John", "tags": ["premium"]},
+        {"name": "Jane", "tags": ["premium_plus"]},
+        {"name": "Joe", "bio": "premium member"}
+    ])
+    query = {"tags": {"$contains": "premium"}}
+    assert [doc["name"] for doc in users.find(query)] == ["John"]
+    assert users.update(query, {"$set": {"vip": True}}) == 1
+    assert [doc["name"] for doc in users.find({"vip": True})] == ["John"]
+    assert users.update({"bio": {"$contains": "mium"}}, {"$set": {"vip": True}}) == 1
+    assert users.delete(query) == 1
+    assert sorted(doc["name"] for doc in users.find()) == ["Jane", "Joe"]
 
 def test_concurrent_operations(db):
     """Test concurrent database operations."""
@@ -71,4 +160,349 @@ def test_concurrent_operations(db):
     for t in threads:
         t.join()
     
-    assert all(results)
\ No newline at end of file
+    assert all(results)
+def test_concurrent_writers(db):
+    """Test that writers in several threads queue on the write lock instead of failing."""
+    users = db.collection("users")
+    users.insert({"name": "seed"})
+    db.pool.busy_timeout_ms = 0  # Only the write lock keeps writers apart
+    errors = []
+    def worker(n):
+        try:
+            for i in range(20):
+                users.insert({"worker": n, "i": i})
+            with db.transaction():
+                users.update({"worker": n}, {"$set": {"done": True}})
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    assert errors == []
+    assert users.count({"done": True}) == 80
+
+def test_concurrent_collection_creation(db):
+    """Test that creating collections and restoring take the write lock like other writes."""
+    db.pool.busy_timeout_ms = 0  # Only the write lock keeps writers apart
+    errors = []
+    def worker(n):
+        try:
+            for i in range(10):
+                db.collection(f"c{n}_{i}").insert({"i": i})
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert db.count_collections() == 40
+    
+    from zenithdb.core.database import PLAN_CACHE_SIZE
+    backup_path = "test_advanced_backup.db"
+    try:
+        db.backup(backup_path)
+        write_lock = db.pool.write_lock
+        db.restore(backup_path)
+        assert db.pool.write_lock is write_lock
+        assert db.pool.statement_cache_size == PLAN_CACHE_SIZE
+        assert db.collection("c0_0").count() == 1
+    finally:
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+
+def test_check_index_usage(db, monkeypatch):
+    """Test that query plans are only explained in debug mode."""
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": 20 + i} for i in range(5)])
+    db.create_index("users", "age")
+    
+    explained = []
+    check = db.check_index_usage
+    monkeypatch.setattr(db, "check_index_usage", lambda sql, params=None: explained.append(sql) or check(sql, params))
+    users.find({"age": {"$gt": 22}})
+    assert explained == []
+    
+    db.debug = True
+    users.find({"name": "User1"})
+    assert len(explained) == 1
+    
+    sql = "SELECT data FROM documents WHERE collection = 'users' AND json_extract(data, '$.age') > ?"
+    assert check(sql, [22]) is True
+    assert check("SELECT data FROM documents WHERE collection = 'users'") is False
+
+def test_plan_cache(db):
+    """Test that query SQL is cached by shape and reused across values."""
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": 20 + i} for i in range(5)])
+    
+    assert len(users.find({"age": {"$gt": 22}})) == 2
+    assert len(users.find({"age": {"$gt": 20}})) == 4
+    assert len(db._plan_cache) == 1
+    
+    # IN lists of any length share one statement
+    assert len(users.find({"age": {"$in": [20]}})) == 1
+    assert len(users.find({"age": {"$in": [20, 21, 22]}})) == 3
+    assert len(db._plan_cache) == 2
+    
+    # Count statements are cached under their own shapes
+    assert users.count({"age": {"$in": [21, 22, 99]}}) == 2
+    assert users.count({"age": {"$in": [20]}}) == 1
+    assert len(db._plan_cache) == 3
+
+def test_plan_cache_per_collection(db):
+    """Test that cached statements are kept per collection, with the name escaped."""
+    users, other = db.collection("users"), db.collection("o'brien")
+    db.create_index("users", "age")
+    for coll in (users, other):
+        coll.insert_many([{"age": age} for age in (20, 30, 40)])
+    
+    assert len(users.find({"age": {"$gt": 25}})) == 2
+    assert len(other.find({"age": {"$gt": 35}})) == 1
+    assert other.count({"age": {"$gt": 25}}) == 2
+    assert other.update({"age": 20}, {"$set": {"age": 21}}) == 1
+    assert other.delete({"age": {"$lt": 35}}) == 2
+    assert users.count() == 3 and other.count() == 1
+    assert len(db._plan_cache) == 5
+
+def test_update_delete_plan_cache(db):
+    """Test that update and delete statements are cached by query and update shape."""
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": 20 + i} for i in range(5)])
+    
+    assert users.update({"age": {"$gt": 22}}, {"$set": {"tier": "gold"}}) == 2
+    assert users.update({"age": {"$lte": 22}}, {"$set": {"tier": "basic"}}) == 3
+    assert users.update({"age": {"$gt": 20}}, {"$set": {"tier": "silver"}}) == 4
+    assert len(db._plan_cache) == 2
+    
+    assert users.delete({"age": {"$gt": 23}}) == 1
+    assert users.delete({"age": {"$gt": 22}}) == 1
+    assert len(db._plan_cache) == 3
+    assert sorted(doc["tier"] for doc in users.find()) == ["basic", "silver", "silver"]
+    
+    # $in lists of any length and value type share one statement
+    assert users.update({"age": {"$in": [20]}}, {"$set": {"tier": "bronze"}}) == 1
+    assert users.update({"tier": {"$in": ["silver", "gold"]}}, {"$set": {"tier": "bronze"}}) == 2
+    assert users.delete({"age": {"$in": [21, 22, 99]}}) == 2
+    assert len(db._plan_cache) == 6
+
+def test_transaction(db):
+    """Test that operations in a transaction block commit together or not at all."""
+    users = db.collection("users")
+    users.set_validator(lambda doc: "name" in doc)
+    with db.transaction():
+        for i in range(5):
+            users.insert({"name": f"User{i}", "age": 20 + i})
+        assert users.update({"age": {"$gt": 22}}, {"$set": {"tier": "gold"}}) == 2
+        assert users.delete({"age": {"$lt": 21}}) == 1
+        assert len(users.find({"tier": "gold"})) == 2
+        
+        # A rejected batch is undone without aborting the transaction
+        with pytest.raises(ValueError):
+            users.insert_many([{"name": "Valid"}, {"age": 99}])
+    assert users.count() == 4
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            users.insert({"name": "Ghost"})
+            users.delete({})
+            raise RuntimeError("abort")
+    assert users.count() == 4
+    assert len(users.find({"name": "Ghost"})) == 0
+
+def test_transaction_schema_changes(db):
+    """Test that validator and index changes in a transaction roll back with it."""
+    orders = db.collection("orders")
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            orders.insert({"total": 5})
+            orders.set_validator({"total": {"type": int}})
+            raise RuntimeError("abort")
+    assert orders.count() == 0
+    with db.pool.get_connection() as conn:
+        assert conn.execute("SELECT validator FROM collections WHERE name = 'orders'").fetchone()[0] is None
+    
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            orders.insert({"total": 5, "note": "gift"})
+            name = db.create_index("orders", "total")
+            db.create_index("orders", "note", index_type="fts")
+            assert len(db.list_indexes("orders")) == 2
+            assert orders.count({"note": {"$contains": "gif"}}) == 1
+            db.drop_index(name)
+            raise RuntimeError("abort")
+    assert db.list_indexes("orders") == []
+    assert orders.count() == 0
+    
+    name = db.create_index("orders", "total")
+    with db.transaction():
+        orders.insert({"total": 7})
+        db.drop_index(name)
+        db.analyze()
+    assert db.list_indexes("orders") == []
+    assert orders.count({"total": 7}) == 1
+
+def test_insert_many_multi_row(db):
+    """Test that inserts spanning several multi-row VALUES statements keep every document."""
+    from zenithdb.operations import ROWS_PER_INSERT
+    
+    total = ROWS_PER_INSERT * 2 + 7
+    ids = [f"doc{i:04d}" for i in range(total)]
+    assert db.insert_many("items", [{"n": i} for i in range(total)], doc_ids=ids) == ids
+    
+    items = db.collection("items")
+    assert items.count() == total
+    assert items.find_one({"_id": ids[-1]})["n"] == total - 1
+    
+    # A document rejected after full statements were written rolls back the batch
+    docs = [{"n": i} for i in range(total)]
+    docs[-1] = {"bad": True}
+    with pytest.raises(ValueError):
+        db.insert_many("items", docs, validator=lambda doc: "n" in doc)
+    assert items.count() == total
+
+def test_bulk_insert_defers_indexes(db, monkeypatch):
+    """Test that large bulk inserts rebuild non-unique indexes afterwards."""
+    from zenithdb import operations
+    monkeypatch.setattr(operations, "DEFER_INDEX_THRESHOLD", 5)
+    
+    users = db.collection("users")
+    idx_name = db.create_index("users", "age")
+    users.insert_many([{"name": f"User{i}", "age": i} for i in range(10)])
+    
+    with db.pool.get_connection() as conn:
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?", [idx_name]
+        ).fetchone()
+    assert row is not None
+    assert len(users.find({"age": {"$gte": 5}})) == 5
+    
+    # A failed insert keeps the indexes, also on a connection outside a transaction
+    from zenithdb.operations import BulkOperations
+    docs = [{"age": i} for i in range(10)] + [{"name": "no age"}]
+    has_age = lambda doc: "age" in doc
+    with pytest.raises(ValueError):
+        db.insert_many("users", docs, validator=has_age)
+    with db.pool.get_connection() as conn:
+        with pytest.raises(ValueError):
+            BulkOperations(conn).bulk_insert("users", docs, validator=has_age)
+        assert conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?", [idx_name]
+        ).fetchone() is not None
+    assert [index["name"] for index in db.list_indexes("users")] == [idx_name]
+    assert users.count() == 10
+
+def test_collection_handle_cache(db):
+    """Test that collection handles are cached and invalidated on drop."""
+    users = db.collection("users")
+    assert db.collection("users") is users
+    
+    users.set_validator({"age": {"type": int}})
+    db.drop_all_collections()
+    
+    fresh = db.collection("users")
+    assert fresh is not users
+    assert fresh.validator is None
+    fresh.insert({"age": "unchecked"})
+
+def test_index_cache(db):
+    """Test that cached index metadata follows index creation and removal."""
+    assert db.list_indexes("users") == []
+    
+    name = db.create_index("users", "email")
+    assert [index["name"] for index in db.list_indexes("users")] == [name]
+    assert db.list_indexes("users")[0]["fields"] == ["email"]
+    
+    db.drop_index(name)
+    assert db.list_indexes("users") == []
+
+def test_connection_pragmas():
+    """Test that pooled connections get the configured PRAGMA settings."""
+    db_path = "test_pragmas.db"
+    db = Database(db_path, cache_mb=8, mmap_mb=16)
+    try:
+        with db.pool.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -8 * 1024
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+            assert conn.execute("PRAGMA journal_size_limit").fetchone()[0] == 64 * 1024 * 1024
+            assert conn.execute("PRAGMA read_uncommitted").fetchone()[0] == 1
+        
+        # Connections opened by other threads are configured the same way
+        settings = []
+        def read_settings():
+            with db.pool.get_connection() as conn:
+                settings.append(conn.execute("PRAGMA cache_size").fetchone()[0])
+        thread = threading.Thread(target=read_settings)
+        thread.start()
+        thread.join()
+        assert settings == [-8 * 1024]
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def test_validator_column_migration():
+    """Test that databases without a validator column are upgraded and still load schemas."""
+    db_path = "test_legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE collections (
+            name TEXT PRIMARY KEY,
+            metadata TEXT DEFAULT '{}',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "INSERT INTO collections (name, metadata) VALUES (?, ?)",
+        ["users", '{"validator": {"schema": {"age": {"type": "int"}}, "fast": true}}']
+    )
+    conn.commit()
+    conn.close()
+    
+    db = Database(db_path)
+    try:
+        users = db.collection("users")
+        with pytest.raises(ValueError):
+            users.insert({"age": "old"})
+        
+        def named(doc):
+            return True
+        users.set_validator(named)
+        db._collections.clear()
+        # Callables are only stored by name, reopening leaves the collection unchecked
+        assert db.collection("users").validator is None
+        db.collection("users").insert({"age": "any"})
+    finally:
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def test_analyze_orders_fields_by_selectivity(db):
+    """Test that gathered statistics put the most selective indexed field first."""
+    users = db.collection("users")
+    users.insert_many([
+        {"status": "active" if i % 2 else "idle", "email": f"user{i}@example.com"}
+        for i in range(50)
+    ])
+    db.create_index("users", "status")
+    db.create_index("users", "email")
+    query = {"status": "active", "email": "user7@example.com"}
+    
+    conditions, _ = users._dict_to_conditions(query)
+    assert [field for field, _, _ in conditions] == ["status", "email"]
+    
+    db.analyze()
+    conditions, _ = users._dict_to_conditions(query)
+    assert [field for field, _, _ in conditions] == ["email", "status"]
+    assert users.find(query)[0]["email"] == "user7@example.com"
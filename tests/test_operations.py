@@ -1,6 +1,8 @@
 import pytest
 from zenithdb.operations import BulkOperations
+from zenithdb.utils.ids import new_id
 import sqlite3
+import time
 
 @pytest.fixture
 def db_connection():
@@ -67,4 +69,30 @@ def test_batch_size_optimization(db_connection):
     # Test with large documents
     large_docs = [{"key": "x" * 10000} for _ in range(1000)]
     batch_size = ops._calculate_optimal_batch_size(large_docs)
-    assert batch_size < 1000
\ No newline at end of file
+    assert batch_size < 1000
+def test_bulk_delete(db_connection):
+    """Test bulk delete for small and large id lists."""
+    ops = BulkOperations(db_connection)
+    ids = ops.bulk_insert("test", [{"key": f"value{i}"} for i in range(300)])
+    ops.bulk_insert("other", [{"key": "keep"}], [ids[0] + "-other"])
+    
+    ops.bulk_delete("test", ids[:10])
+    ops.bulk_delete("test", ids[10:250])
+    
+    remaining = db_connection.execute("SELECT COUNT(*) FROM documents WHERE collection = 'test'").fetchone()[0]
+    assert remaining == 50
+    assert db_connection.execute("SELECT COUNT(*) FROM documents WHERE collection = 'other'").fetchone()[0] == 1
+
+def test_generated_ids_are_time_ordered(db_connection):
+    """Test that generated document ids are unique and sort by insertion order."""
+    ops = BulkOperations(db_connection)
+    first = ops.bulk_insert("test", [{"key": i} for i in range(50)])
+    time.sleep(0.002)
+    second = ops.bulk_insert("test", [{"key": i} for i in range(50)])
+    
+    assert all(len(doc_id) == 26 for doc_id in first + second)
+    assert len(set(first + second)) == 100
+    assert max(first) < min(second)
+    assert set("".join(first + second)) <= set("0123456789ABCDEFGHJKMNPQRSTVWXYZ")
+    time.sleep(0.002)
+    assert new_id() > max(second)
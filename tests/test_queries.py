@@ -1,6 +1,7 @@
 import os
+import threading
 import pytest
-from zenithdb import Database, Query
+from zenithdb import Database, Query, QueryOperator
 
 @pytest.fixture
 def db():
@@ -84,6 +85,12 @@ def test_array_operations(db):
         "name": {"$contains": "o"}
     })
     assert len(results) == 2
+    
+    # Array contains matches whole elements only
+    users.insert({"name": "Eve", "tags": ["premium"]})
+    assert len(users.find({"tags": {"$contains": "prem"}})) == 0
+    assert len(users.find({"tags": {"$contains": "premium"}})) == 1
+    assert users.count({"tags": {"$contains": "d"}}) == 2
 
 def test_comparison_operators(db):
     """Test comparison operators."""
@@ -111,6 +118,12 @@ def test_comparison_operators(db):
     # Test not equal
     results = users.find({"age": {"$ne": 30}})
     assert len(results) == 2
+    
+    # Test find_one with comparison and regex operators
+    assert users.find_one({"age": {"$gt": 30}})["name"] == "Bob"
+    assert users.find_one({"age": {"$lt": 30}})["name"] == "Alice"
+    assert users.find_one({"name": {"$regex": "^Bo"}})["name"] == "Bob"
+    assert users.find_one({"age": {"$gt": 40}}) is None
 
 def test_complex_combinations(db):
     """Test complex query combinations."""
@@ -140,4 +153,138 @@ def test_complex_combinations(db):
         (q.profile.level == "gold")
     )
     assert len(results) == 1
-    assert results[0]["name"] == "John"
\ No newline at end of file
+    assert results[0]["name"] == "John"
+def test_residual_predicates(db):
+    """Test predicates evaluated in Python after SQL pushdown."""
+    users = db.collection("users")
+    users.insert_many([
+        {"name": "John", "email": "john@example.com", "age": 30, "bio": "Python developer"},
+        {"name": "Jane", "email": "jane@test.org", "age": 25, "bio": "Designer"},
+        {"name": "Joe", "email": "joe@example.com", "age": 40, "bio": "python fan"}
+    ])
+    
+    results = users.find({"email": {"$regex": r"@example\.com$"}, "age": {"$lt": 35}})
+    assert [doc["name"] for doc in results] == ["John"]
+    
+    results = users.find({"*": {"$contains": "PYTHON"}, "age": {"$gt": 35}})
+    assert [doc["name"] for doc in results] == ["Joe"]
+    # Terms only found in field names are not matches
+    assert users.find({"*": {"$contains": "email"}, "age": {"$gt": 0}}) == []
+    assert users.count({"email": {"$regex": r"@example\.com$"}}) == 2
+    assert users.count({"*": {"$contains": "python"}, "age": {"$lt": 35}}) == 1
+    
+    assert len(users.find({"name": {"$startsWith": "Jo"}})) == 2
+    assert len(users.find({"email": {"$endsWith": ".org"}})) == 1
+
+def test_find_iter(db, monkeypatch):
+    """Test streaming query results across fetch batches."""
+    from zenithdb.core import database
+    monkeypatch.setattr(database, "FETCH_BATCH_SIZE", 3)
+    
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": i, "email": f"u{i}@{'a' if i % 2 else 'b'}.com"}
+                       for i in range(10)])
+    
+    results = users.find_iter({"age": {"$gte": 2}})
+    assert not isinstance(results, list)
+    assert sorted(doc["age"] for doc in results) == list(range(2, 10))
+    assert len(list(users.find_iter())) == 10
+    assert sorted(doc["age"] for doc in users.find_iter({"email": {"$regex": r"@a\.com$"}})) == [1, 3, 5, 7, 9]
+    
+    q = Query()
+    assert [doc["age"] for doc in users.find_iter((q.age < 3) & (q.age > 0))] in ([1, 2], [2, 1])
+    
+    # Stopping early leaves the connection usable
+    assert next(iter(users.find_iter({"age": {"$gt": 0}})))["age"] > 0
+    assert users.find_one({"email": {"$regex": "@b"}, "age": {"$gt": 5}})["age"] in (6, 8)
+
+def test_query_compile(db):
+    """Test that a query keeps its SQL across pages and rebuilds it when its shape changes."""
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": i} for i in range(10)])
+    
+    q = Query(collection="users", database=db)
+    q.where("age", QueryOperator.GTE, 2).sort("age").limit(3)
+    sql, params = q.compile()
+    assert [doc["age"] for doc in q.execute()] == [2, 3, 4]
+    
+    q.skip(3)
+    next_sql, next_params = q.compile()
+    assert next_sql is sql
+    assert next_params == [2, 3, 3]
+    assert [doc["age"] for doc in db.execute_query(q)] == [5, 6, 7]
+    
+    q.where("name", QueryOperator.NE, "User6")
+    assert q.compile()[0] is not sql
+    assert [doc["age"] for doc in db.execute_query(q)] == [5, 7, 8]
+
+def test_query_many(db):
+    """Test that independent queries run in parallel return their own results in order."""
+    users = db.collection("users")
+    users.insert_many([{"name": f"User{i}", "age": 20 + i} for i in range(10)])
+    
+    queries = []
+    for low in (20, 25, 29, 40):
+        q = Query(collection="users")
+        queries.append(q.age >= low)
+    
+    results = db.query_many(queries)
+    assert [len(result) for result in results] == [10, 5, 1, 0]
+    assert results[2][0]["name"] == "User9"
+
+    # The workers stopped by restore start again on the next call
+    backup_path = "test_queries_backup.db"
+    try:
+        db.backup(backup_path)
+        users.insert({"name": "User10", "age": 30})
+        db.restore(backup_path)
+        assert [len(result) for result in db.query_many(queries)] == [10, 5, 1, 0]
+    finally:
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+
+def test_query_many_connection_limits(db, monkeypatch):
+    """Test that query_many stays within the pool and sees the caller's transaction."""
+    small = Database("test_queries_small.db", max_connections=4)
+    try:
+        users = small.collection("users")
+        users.insert_many([{"name": f"User{i}", "age": 20 + i} for i in range(10)])
+        queries = [Query(collection="users").where("age", QueryOperator.GTE, 20 + i % 10) for i in range(20)]
+        expected = [10 - i % 10 for i in range(20)]
+        assert [len(result) for result in small.query_many(queries)] == expected
+        
+        # Workers leave one connection for the caller, and a caller that keeps
+        # one while iterating runs the queries itself
+        assert small._executor()._max_workers == 3
+        threads = []
+        execute_query = small.execute_query
+        monkeypatch.setattr(small, "execute_query",
+                            lambda query: threads.append(threading.current_thread()) or execute_query(query))
+        results = users.find_iter({"age": {"$gte": 20}})
+        next(results)
+        assert [len(result) for result in small.query_many(queries)] == expected
+        assert set(threads) == {threading.current_thread()}
+        list(results)
+        
+        # Uncommitted writes of the caller's transaction are visible
+        with small.transaction():
+            users.insert({"name": "New", "age": 99})
+            late = [Query(collection="users").where("age", QueryOperator.EQ, 99) for _ in range(2)]
+            assert [len(result) for result in small.query_many(late)] == [1, 1]
+    finally:
+        small.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists("test_queries_small.db" + suffix):
+                os.remove("test_queries_small.db" + suffix)
+
+def test_field_name_quoting(db):
+    """Test fields whose names need quoting in JSON paths."""
+    users = db.collection("users")
+    users.insert_many([
+        {"first name": "Ann", "it's": 1, "profile": {"home-city": "Oslo"}},
+        {"first name": "Ben", "it's": 2, "profile": {"home-city": "Rome"}}
+    ])
+    
+    assert users.find_one({"first name": "Ben"})["it's"] == 2
+    assert users.find({"it's": {"$gt": 1}})[0]["first name"] == "Ben"
+    assert users.count({"profile.home-city": "Oslo"}) == 1
@@ -102,6 +102,17 @@ def test_bulk_operations(users_collection):
     all_users = list(users_collection.find({}))
     assert len(all_users) == 2
 
+    # Bulk update merges each patch into its document, skipping entries without an id
+    users_collection.bulk_operations().bulk_update("users", [
+        {"_id": ids[0], "address": {"city": "Leeds"}},
+        {"_id": ids[1], "age": 36},
+        {"age": 99}
+    ])
+    alice = users_collection.find_one({"_id": ids[0]})
+    assert alice["address"] == {"city": "Leeds", "country": "UK"}
+    assert users_collection.find_one({"_id": ids[1]})["age"] == 36
+    assert users_collection.count({"age": 99}) == 0
+
 def test_complex_queries(users_collection):
     """Test complex query operations."""
     # Insert test data
@@ -198,6 +209,22 @@ def test_aggregations(users_collection):
                     if c["address.country"] == "USA")
     assert usa_count == 2
 
+    # Test global count with the function given by name
+    total = users_collection.aggregate([{
+        "group": {
+            "field": None,
+            "function": "COUNT",
+            "alias": "total"
+        }
+    }])
+    assert total == [{"total": 3}]
+    
+    # Aliases are quoted, so any name is returned as given
+    total = users_collection.aggregate([{
+        "group": {"field": None, "function": "COUNT", "alias": 'total" FROM documents; --'}
+    }])
+    assert total == [{'total" FROM documents; --': 3}]
+
 def test_indexes(users_collection):
     """Test index operations."""
     db = users_collection.database
@@ -226,6 +253,14 @@ def test_indexes(users_collection):
             "age": 30
         })
 
+    # A failed update is rolled back, so later transactions can start
+    users_collection.insert({"name": "Other User", "email": "other@example.com", "age": 30})
+    with pytest.raises(sqlite3.IntegrityError):
+        users_collection.update({"email": "other@example.com"}, {"$set": {"email": "test@example.com"}})
+    with db.transaction():
+        users_collection.update({"email": "other@example.com"}, {"$set": {"age": 31}})
+    assert users_collection.find_one({"email": "other@example.com"})["age"] == 31
+
 def test_relationships(db):
     """Test relationships between collections."""
     users = db.collection("users")
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Any, Dict, List, Optional
-import json
+from .utils.paths import json_extract_sql, sql_identifier
+from .utils.serialization import loads
 
 class AggregateFunction(str, Enum):
     """Supported aggregation functions."""
@@ -29,8 +30,9 @@ class Aggregations:
                 if "group" in stage:
                     group = stage["group"]
                     field = group.get("field")
-                    func = group["function"].value
+                    func = AggregateFunction(group["function"]).value
                     alias = group["alias"]
+                    alias_sql = sql_identifier(alias)
                     target = group.get("target", field)
                     
                     # Build SQL query based on function
@@ -39,30 +41,30 @@ class Aggregations:
                         if field:
                             # Group by field with median
                             sql = f"""
-                                SELECT json_extract(data, '$.{field}') as group_field,
-                                       (SELECT json_extract(d.data, '$.{target}') 
+                                SELECT {json_extract_sql(field)} as group_field,
+                                       (SELECT {json_extract_sql(target, 'd.data')} 
                                         FROM documents d
-                                        WHERE d.collection = ? AND json_extract(d.data, '$.{field}') = json_extract(documents.data, '$.{field}')
-                                        ORDER BY CAST(json_extract(d.data, '$.{target}') AS NUMERIC)
+                                        WHERE d.collection = ? AND {json_extract_sql(field, 'd.data')} = {json_extract_sql(field, 'documents.data')}
+                                        ORDER BY CAST({json_extract_sql(target, 'd.data')} AS NUMERIC)
                                         LIMIT 1
                                         OFFSET (SELECT COUNT(*) 
                                                 FROM documents d2 
-                                                WHERE d2.collection = ? AND json_extract(d2.data, '$.{field}') = json_extract(documents.data, '$.{field}')
-                                               ) / 2) as {alias}
+                                                WHERE d2.collection = ? AND {json_extract_sql(field, 'd2.data')} = {json_extract_sql(field, 'documents.data')}
+                                               ) / 2) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
-                                GROUP BY json_extract(data, '$.{field}')
+                                GROUP BY {json_extract_sql(field)}
                             """
                             params = [collection, collection, collection]
                         else:
                             # Global median
                             sql = f"""
-                                SELECT (SELECT json_extract(data, '$.{target}') 
+                                SELECT (SELECT {json_extract_sql(target)} 
                                         FROM documents 
                                         WHERE collection = ?
-                                        ORDER BY CAST(json_extract(data, '$.{target}') AS NUMERIC)
+                                        ORDER BY CAST({json_extract_sql(target)} AS NUMERIC)
                                         LIMIT 1
-                                        OFFSET (SELECT COUNT(*) FROM documents WHERE collection = ?) / 2) as {alias}
+                                        OFFSET (SELECT COUNT(*) FROM documents WHERE collection = ?) / 2) as {alias_sql}
                             """
                             params = [collection, collection]
                     elif func == AggregateFunction.STDDEV.value:
@@ -70,23 +72,23 @@ class Aggregations:
                         if field:
                             # Group by field with standard deviation
                             sql = f"""
-                                SELECT json_extract(data, '$.{field}') as group_field,
-                                       SQRT(AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC) * 
-                                                CAST(json_extract(data, '$.{target}') AS NUMERIC)) - 
-                                            (AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC)) * 
-                                             AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC)))) as {alias}
+                                SELECT {json_extract_sql(field)} as group_field,
+                                       SQRT(AVG(CAST({json_extract_sql(target)} AS NUMERIC) * 
+                                                CAST({json_extract_sql(target)} AS NUMERIC)) - 
+                                            (AVG(CAST({json_extract_sql(target)} AS NUMERIC)) * 
+                                             AVG(CAST({json_extract_sql(target)} AS NUMERIC)))) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
-                                GROUP BY json_extract(data, '$.{field}')
+                                GROUP BY {json_extract_sql(field)}
                             """
                             params = [collection]
                         else:
                             # Global standard deviation
                             sql = f"""
-                                SELECT SQRT(AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC) * 
-                                            CAST(json_extract(data, '$.{target}') AS NUMERIC)) - 
-                                        (AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC)) * 
-                                         AVG(CAST(json_extract(data, '$.{target}') AS NUMERIC)))) as {alias}
+                                SELECT SQRT(AVG(CAST({json_extract_sql(target)} AS NUMERIC) * 
+                                            CAST({json_extract_sql(target)} AS NUMERIC)) - 
+                                        (AVG(CAST({json_extract_sql(target)} AS NUMERIC)) * 
+                                         AVG(CAST({json_extract_sql(target)} AS NUMERIC)))) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
                             """
@@ -95,37 +97,58 @@ class Aggregations:
                         if field:
                             # Group by field with distinct count
                             sql = f"""
-                                SELECT json_extract(data, '$.{field}') as group_field,
-                                       COUNT(DISTINCT json_extract(data, '$.{target}')) as {alias}
+                                SELECT {json_extract_sql(field)} as group_field,
+                                       COUNT(DISTINCT {json_extract_sql(target)}) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
-                                GROUP BY json_extract(data, '$.{field}')
+                                GROUP BY {json_extract_sql(field)}
                             """
                             params = [collection]
                         else:
                             # Global distinct count
                             sql = f"""
-                                SELECT COUNT(DISTINCT json_extract(data, '$.{target}')) as {alias}
+                                SELECT COUNT(DISTINCT {json_extract_sql(target)}) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
                             """
                             params = [collection]
+                    elif func == AggregateFunction.COUNT.value:
+                        # Count rows, or non-null values when an explicit target is given
+                        if "target" in group:
+                            counted = f"COUNT({json_extract_sql(target)})"
+                        else:
+                            counted = "COUNT(*)"
+                        if field:
+                            sql = f"""
+                                SELECT {json_extract_sql(field)} as group_field,
+                                       {counted} as {alias_sql}
+                                FROM documents
+                                WHERE collection = ?
+                                GROUP BY {json_extract_sql(field)}
+                            """
+                        else:
+                            sql = f"""
+                                SELECT {counted} as {alias_sql}
+                                FROM documents
+                                WHERE collection = ?
+                            """
+                        params = [collection]
                     else:
                         # Regular aggregation functions
                         if field:
                             # Group by field
                             sql = f"""
-                                SELECT json_extract(data, '$.{field}') as group_field,
-                                       {func}(CAST(json_extract(data, '$.{target}') AS NUMERIC)) as {alias}
+                                SELECT {json_extract_sql(field)} as group_field,
+                                       {func}(CAST({json_extract_sql(target)} AS NUMERIC)) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
-                                GROUP BY json_extract(data, '$.{field}')
+                                GROUP BY {json_extract_sql(field)}
                             """
                             params = [collection]
                         else:
                             # Global aggregation
                             sql = f"""
-                                SELECT {func}(CAST(json_extract(data, '$.{target}') AS NUMERIC)) as {alias}
+                                SELECT {func}(CAST({json_extract_sql(target)} AS NUMERIC)) as {alias_sql}
                                 FROM documents
                                 WHERE collection = ?
                             """
@@ -138,8 +161,8 @@ class Aggregations:
                     for row in cursor:
                         if field:
                             try:
-                                field_value = json.loads(row[0]) if isinstance(row[0], str) else row[0]
-                            except (json.JSONDecodeError, TypeError):
+                                field_value = loads(row[0]) if isinstance(row[0], str) else row[0]
+                            except (ValueError, TypeError):
                                 field_value = row[0]
                             results.append({
                                 field: field_value,
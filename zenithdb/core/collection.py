@@ -1,10 +1,243 @@
+import functools
 import json
 import logging
 import sqlite3
-from typing import Any, Dict, List, Optional, Union, Callable
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, Callable
 from ..query import Query, QueryOperator
 from ..operations import BulkOperations
 from ..aggregations import Aggregations, AggregateFunction
+from ..matcher import compile_matcher, search_value
+from ..utils.paths import json_extract_sql, sql_identifier
+from ..utils.serialization import dumps, loads
+
+# Types that can be named in a persisted validator schema
+_SCHEMA_TYPES = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+}
+_SCHEMA_RULES = {"type", "min", "max", "required"}
+
+# Dict query operators (without the ``$``) that translate directly into SQL conditions
+_DICT_OPERATORS = {
+    "eq": QueryOperator.EQ,
+    "ne": QueryOperator.NE,
+    "gt": QueryOperator.GT,
+    "gte": QueryOperator.GTE,
+    "lt": QueryOperator.LT,
+    "lte": QueryOperator.LTE,
+    "in": QueryOperator.IN,
+    "contains": QueryOperator.CONTAINS,
+    "startsWith": QueryOperator.STARTS_WITH,
+    "endsWith": QueryOperator.ENDS_WITH,
+}
+
+@functools.lru_cache(maxsize=256)
+def _query_template(shape: Tuple[Any, ...], indexed_fields: Tuple[str, ...]) -> Tuple[Tuple[Any, ...], Tuple[Any, ...]]:
+    """
+    Plan how a dict query shape is split into SQL conditions and Python predicates.
+    
+    Args:
+        shape: ``(field, keys)`` pairs, where keys are the operator keys of a dict
+               value or None for a plain value
+        indexed_fields: Fields of the collection's indexes, most selective first
+    
+    Returns:
+        ``(field, operator, key)`` conditions with indexed fields first, and the
+        ``(field, key)`` predicates checked in Python; a key of None stands for
+        the field's whole value
+    """
+    rank: Dict[str, int] = {}
+    for field in indexed_fields:
+        rank.setdefault(field, len(rank))
+    ordered = sorted(shape, key=lambda item: rank.get(item[0], len(rank)))
+    
+    conditions = []
+    residual = []
+    for field, keys in ordered:
+        if field == "*":
+            # Terms SQLite can search for are dropped from the residual when bound
+            residual.append((field, None))
+            if keys and "$contains" in keys:
+                conditions.append((field, QueryOperator.CONTAINS, "$contains"))
+        elif keys is None:
+            conditions.append((field, QueryOperator.EQ, None))
+        else:
+            for key in keys:
+                op = key.lstrip("$")
+                if op == "regex":
+                    residual.append((field, key))
+                elif op in _DICT_OPERATORS:
+                    conditions.append((field, _DICT_OPERATORS[op], key))
+                else:
+                    raise ValueError(f"Unsupported query operator: {key}")
+    return tuple(conditions), tuple(residual)
+
+def _text_prefilter_term(search_term: Any) -> Optional[str]:
+    """
+    Get the lowercased term to pre-filter raw JSON text with, if that is safe.
+    
+    Printable ASCII without quotes or backslashes is stored verbatim in the JSON
+    text, so SQLite can search for it with ``instr`` on the lowercased text.
+    """
+    term = str(search_term).lower()
+    if term and term.isascii() and term.isprintable() and '"' not in term and '\\' not in term:
+        return term
+    return None
+
+def _compile_validator(schema: Dict[str, Dict[str, Any]], fast: bool = True) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a schema dict into a single validator function.
+    
+    The schema maps field names to rules (``type``, ``min``, ``max``, ``required``),
+    e.g. ``{"age": {"type": int, "min": 0}}``. The rules are turned into Python
+    source once and compiled, so validating a document is a single call with
+    no per-rule dispatch. Types match exactly, except that ints are accepted
+    for ``float`` (bools are not); values that cannot be compared with ``min``
+    or ``max`` fail validation.
+    
+    Args:
+        schema: Field rules to compile
+        fast: If True the function only returns a bool, otherwise it raises
+              ValueError describing the first failing rule
+    """
+    namespace: Dict[str, Any] = {}
+    exprs = []
+    lines = ["def _v(d):"]
+    
+    for i, (field, rules) in enumerate(schema.items()):
+        unknown = set(rules) - _SCHEMA_RULES
+        if unknown:
+            raise ValueError(f"Unknown validator rules for field '{field}': {', '.join(sorted(unknown))}")
+        
+        checks = []
+        if "type" in rules:
+            types = rules["type"] if isinstance(rules["type"], tuple) else (rules["type"],)
+            if float in types and int not in types:
+                types += (int,)
+            namespace[f"_t{i}"] = types if len(types) > 1 else types[0]
+            if isinstance(rules["type"], tuple):
+                checks.append(("type({v}) in _t%d" % i, f"'{field}' has invalid type"))
+            elif len(types) > 1:
+                checks.append(("type({v}) in _t%d" % i, f"'{field}' must be of type {rules['type'].__name__}"))
+            else:
+                checks.append(("type({v}) is _t%d" % i, f"'{field}' must be of type {rules['type'].__name__}"))
+        # Comparisons can raise TypeError for values of other types, which counts as failing
+        if "min" in rules:
+            namespace[f"_min{i}"] = rules["min"]
+            checks.append(("{v} >= _min%d" % i, f"'{field}' must be >= {rules['min']!r}"))
+        if "max" in rules:
+            namespace[f"_max{i}"] = rules["max"]
+            checks.append(("{v} <= _max%d" % i, f"'{field}' must be <= {rules['max']!r}"))
+        required = rules.get("required", True)
+        
+        if fast:
+            checked = " and ".join(check.format(v=f"d[{field!r}]") for check, _ in checks)
+            if required:
+                exprs.append(f"({field!r} in d and {checked})" if checked else f"({field!r} in d)")
+            elif checked:
+                exprs.append(f"({field!r} not in d or {checked})")
+        else:
+            lines.append(f"    if {field!r} in d:")
+            lines.append(f"        v = d[{field!r}]")
+            for check, message in checks:
+                error = f"ValueError({'Document failed validation: ' + message!r})"
+                if check.startswith("type("):
+                    lines.append(f"        if not ({check.format(v='v')}):")
+                    lines.append(f"            raise {error}")
+                else:
+                    lines.append("        try:")
+                    lines.append(f"            if not ({check.format(v='v')}):")
+                    lines.append(f"                raise {error}")
+                    lines.append("        except TypeError:")
+                    lines.append(f"            raise {error} from None")
+            lines.append("        pass")
+            if required:
+                lines.append("    else:")
+                lines.append(f"        raise ValueError({'Document failed validation: ' + repr(field) + ' is required'!r})")
+    
+    if fast:
+        lines.append("    try:")
+        lines.append(f"        return {' and '.join(exprs) or 'True'}")
+        lines.append("    except TypeError:")
+        lines.append("        return False")
+    else:
+        lines.append("    return True")
+    
+    exec(compile("\n".join(lines), "<validator>", "exec"), namespace)
+    return namespace["_v"]
+
+def _schema_to_json(schema: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Convert a validator schema to a JSON-serializable form for metadata.
+    
+    Raises ValueError for types outside ``_SCHEMA_TYPES``, which could not be
+    restored when the collection is reopened.
+    """
+    result = {}
+    for field, rules in schema.items():
+        rules = dict(rules)
+        if "type" in rules:
+            types = rules["type"] if isinstance(rules["type"], tuple) else (rules["type"],)
+            for t in types:
+                if _SCHEMA_TYPES.get(getattr(t, "__name__", None)) is not t:
+                    raise ValueError(f"Unsupported type for field '{field}': {t!r}; "
+                                     f"use one of {', '.join(_SCHEMA_TYPES)}")
+            names = [t.__name__ for t in types]
+            rules["type"] = names if isinstance(rules["type"], tuple) else names[0]
+        result[field] = rules
+    return result
+
+def _schema_from_json(schema: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Rebuild a validator schema from its persisted JSON form."""
+    result = {}
+    for field, rules in schema.items():
+        rules = dict(rules)
+        if "type" in rules:
+            if isinstance(rules["type"], list):
+                rules["type"] = tuple(_SCHEMA_TYPES[name] for name in rules["type"])
+            else:
+                rules["type"] = _SCHEMA_TYPES[rules["type"]]
+        result[field] = rules
+    return result
+
+def _compile_json_schema(schema: Dict[str, Any], fast: bool = True) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a JSON Schema into a validator function with fastjsonschema.
+    
+    fastjsonschema generates Python source specialized to the schema, the same
+    approach as ``_compile_validator``. Defaults declared in the schema are not
+    filled into documents.
+    """
+    try:
+        import fastjsonschema
+    except ImportError:
+        raise ImportError(
+            "JSON Schema validation requires fastjsonschema: pip install \"zenithdb[jsonschema]\""
+        ) from None
+    
+    validate = fastjsonschema.compile(schema, use_default=False)
+    schema_error = fastjsonschema.JsonSchemaException
+    
+    if fast:
+        def _v(d):
+            try:
+                validate(d)
+            except schema_error:
+                return False
+            return True
+    else:
+        def _v(d):
+            try:
+                validate(d)
+            except schema_error as e:
+                raise ValueError(f"Document failed validation: {e}") from None
+            return True
+    return _v
 
 class Collection:
     """Collection interface for document operations."""
@@ -14,36 +247,56 @@ class Collection:
         self.database = database
         self.name = name
         self.validator = None
+        self.batch_validator = None
+        # Unfiltered statements, with the collection inlined like the plan cache's SQL
+        collection_filter = database._collection_filter(name)
+        self._scan_sql = f"SELECT data FROM documents WHERE {collection_filter} LIMIT ?"
+        self._count_sql = f"SELECT COUNT(*) FROM documents WHERE {collection_filter}"
         self._ensure_collection_exists()
     
     def _ensure_collection_exists(self):
-        """Ensure collection exists with proper locking and error handling."""
-        with self.database.pool.get_connection() as conn:
+        """
+        Ensure collection exists with proper locking and error handling.
+        
+        Existing collections are only read, outside of any transaction; the write
+        lock is taken only to create a missing collection.
+        """
+        with self.database._connection() as conn:
             try:
-                conn.execute("BEGIN IMMEDIATE")  # Get an immediate lock
                 cursor = conn.cursor()
-                cursor.execute("SELECT metadata FROM collections WHERE name = ?", [self.name])
+                cursor.execute("SELECT metadata, validator FROM collections WHERE name = ?", [self.name])
                 result = cursor.fetchone()
                 
                 if result is None:
                     # Collection doesn't exist, create it
-                    metadata = {"validator": None, "indexes": [], "options": {}}
-                    cursor.execute(
-                        "INSERT INTO collections (name, metadata) VALUES (?, ?)",
-                        [self.name, json.dumps(metadata)]
-                    )
-                else:
-                    # Collection exists, update timestamp and load validator
-                    metadata = json.loads(result[0])
-                    if metadata.get("validator"):
-                        self.validator = metadata["validator"]
-                    cursor.execute(
-                        "UPDATE collections SET updated_at = CURRENT_TIMESTAMP WHERE name = ?",
-                        [self.name]
-                    )
-                conn.commit()
+                    metadata = {"indexes": [], "options": {}}
+                    with self.database._write_transaction() as writer:
+                        created = writer.execute(
+                            "INSERT OR IGNORE INTO collections (name, metadata) VALUES (?, ?)",
+                            [self.name, dumps(metadata)]
+                        ).rowcount
+                    if created == 0:
+                        # Created concurrently, load what the other writer stored
+                        cursor.execute("SELECT metadata, validator FROM collections WHERE name = ?", [self.name])
+                        result = cursor.fetchone()
+                
+                if result is not None:
+                    # Collection exists, load its validator; opening it is not a write.
+                    # Older databases kept the validator in the metadata blob.
+                    if result[1] is not None:
+                        validator = loads(result[1])
+                    else:
+                        validator = loads(result[0]).get("validator")
+                    # Only schemas can be rebuilt, callables are stored by name for reference
+                    if isinstance(validator, dict) and "schema" in validator:
+                        self.validator = _compile_validator(
+                            _schema_from_json(validator["schema"]), validator.get("fast", True)
+                        )
+                    elif isinstance(validator, dict) and "json_schema" in validator:
+                        self.validator = _compile_json_schema(validator["json_schema"], validator.get("fast", True))
             except Exception as e:
-                conn.rollback()
+                if not self.database._in_transaction():
+                    conn.rollback()
                 logging.error(f"Failed to initialize collection {self.name}: {e}")
                 raise
     
@@ -53,55 +306,114 @@ class Collection:
     def __repr__(self):
         return self.name
     
-    def print_collection(self):
-        """Print a formatted view of the collection contents."""
-        print_dict = {}
+    def print_collection(self, pretty: bool = False):
+        """
+        Print the collection contents as JSON.
+        
+        By default the stored JSON text of the metadata, documents and index fields
+        is written as is, one document per line, without decoding it. Rows are
+        written as they are read from the cursor, so memory use stays at one
+        document regardless of the collection size.
+        
+        Args:
+            pretty: Re-indent everything with 4 spaces, which decodes each document
+        """
         with self.database.pool.get_connection() as conn:
             cursor = conn.cursor()
-            # Use row factory to allow column name access
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT * FROM collections WHERE name = ?", [self.name])
+            cursor.execute("SELECT metadata FROM collections WHERE name = ?", [self.name])
             metadata_row = cursor.fetchone()
-            if metadata_row:
-                print_dict["metadata"] = json.loads(metadata_row["metadata"])
-                print_dict["name"] = self.name
-                
-                cursor.execute("SELECT * FROM documents WHERE collection = ?", [self.name])
-                print_dict["documents"] = [json.loads(row["data"]) for row in cursor.fetchall()]
-                
-                cursor.execute("SELECT * FROM indexes WHERE collection = ?", [self.name])
-                print_dict["indexes"] = [json.loads(row["fields"]) for row in cursor.fetchall()]
-                
-                print(json.dumps(print_dict, indent=4, ensure_ascii=False))
-            else:
+            if not metadata_row:
                 print(f"Collection '{self.name}' not found")
-            conn.commit()
+                return
+            
+            write = sys.stdout.write
+            
+            if pretty:
+                def render(text: str, level: int) -> str:
+                    value = json.dumps(loads(text), indent=4, ensure_ascii=False)
+                    return value.replace("\n", "\n" + " " * 4 * level)
+            else:
+                def render(text: str, level: int) -> str:
+                    return text
+            
+            def write_array(key: str, rows) -> None:
+                write(f'    "{key}": [')
+                separator = "\n        "
+                for row in rows:
+                    write(separator + render(row[0], 2))
+                    separator = ",\n        "
+                write("]" if separator == "\n        " else "\n    ]")
+            
+            # Same layout as json.dumps(..., indent=4) of the whole collection
+            write('{\n    "metadata": ' + render(metadata_row[0], 1) + ",\n")
+            write('    "name": ' + json.dumps(self.name, ensure_ascii=False) + ",\n")
+            cursor.execute("SELECT data FROM documents WHERE collection = ?", [self.name])
+            write_array("documents", cursor)
+            write(",\n")
+            cursor.execute("SELECT fields FROM indexes WHERE collection = ?", [self.name])
+            write_array("indexes", cursor)
+            write("\n}\n")
     
-    def set_validator(self, validator_func: Callable[[Dict[str, Any]], bool]):
-        """Set and persist document validator function."""
-        self.validator = validator_func
-        with self.database.pool.get_connection() as conn:
-            try:
-                conn.execute("BEGIN")
-                cursor = conn.cursor()
-                cursor.execute("SELECT metadata FROM collections WHERE name = ?", [self.name])
-                metadata = json.loads(cursor.fetchone()[0])
-                metadata["validator"] = validator_func.__name__  # Store function name for reference
-                cursor.execute(
-                    "UPDATE collections SET metadata = ? WHERE name = ?",
-                    [json.dumps(metadata), self.name]
+    def set_validator(self, validator: Union[Callable[[Dict[str, Any]], bool], Dict[str, Dict[str, Any]]],
+                      fast: bool = True, vectorized: bool = False):
+        """
+        Set and persist a document validator.
+        
+        Args:
+            validator: A callable returning True for valid documents, or a schema dict
+                       such as ``{"age": {"type": int, "min": 0}}`` that is compiled
+                       into a single validator function
+            fast: For schema validators, only return a bool instead of raising a
+                  ValueError that names the failing rule
+            vectorized: The callable takes a list of documents and returns one truth
+                        value per document (e.g. a NumPy mask), so ``insert_many``
+                        validates a whole batch with a single call
+        """
+        self.batch_validator = None
+        if isinstance(validator, dict):
+            stored = {"schema": _schema_to_json(validator), "fast": fast}
+            self.validator = _compile_validator(validator, fast)
+        elif vectorized:
+            self.batch_validator = validator
+            self.validator = lambda document: bool(validator([document])[0])
+            stored = validator.__name__
+        else:
+            self.validator = validator
+            stored = validator.__name__  # Store function name for reference
+        self._store_validator(stored)
+    
+    def set_schema(self, schema: Dict[str, Any], fast: bool = True):
+        """
+        Set and persist a JSON Schema that documents are validated against.
+        
+        Requires the optional fastjsonschema package, which compiles the schema
+        into a specialized validator function once.
+        
+        Args:
+            schema: JSON Schema, e.g. ``{"type": "object", "required": ["name"]}``
+            fast: Only return a bool instead of raising a ValueError that names
+                  the failing rule
+        """
+        self.validator = _compile_json_schema(schema, fast)
+        self.batch_validator = None
+        self._store_validator({"json_schema": schema, "fast": fast})
+    
+    def _store_validator(self, stored: Any):
+        """Persist the JSON form of the collection's validator."""
+        try:
+            with self.database._write_transaction() as conn:
+                conn.execute(
+                    "UPDATE collections SET validator = ? WHERE name = ?",
+                    [dumps(stored), self.name]
                 )
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                logging.error(f"Failed to set validator for collection {self.name}: {e}")
-                raise
+        except Exception as e:
+            logging.error(f"Failed to set validator for collection {self.name}: {e}")
+            raise
     
     def insert(self, document: Dict[str, Any], doc_id: Optional[str] = None) -> str:
         """Insert a document into the collection."""
-        if self.validator and not self.validator(document):
+        validator = self.validator
+        if validator is not None and not validator(document):
             raise ValueError("Document failed validation")
         return self.database.insert(self.name, document, doc_id)
     
@@ -110,113 +422,134 @@ class Collection:
         if not documents:
             return []
             
-        # Validate documents if a validator is set
-        if self.validator:
-            for doc in documents:
-                if not self.validator(doc):
-                    raise ValueError("Document failed validation")
+        validator = self.validator
+        if self.batch_validator is not None:
+            # Vectorized validators check the whole batch up front in one call
+            if not all(self.batch_validator(documents)):
+                raise ValueError("Document failed validation")
+            validator = None
         
-        # Use bulk operations with proper transaction handling
-        with self.database.pool.get_connection() as conn:
-            try:
-                conn.execute("BEGIN IMMEDIATE")
-                ops = BulkOperations(conn)
-                doc_ids = ops.bulk_insert(self.name, documents)
-                conn.commit()
-                return doc_ids
-            except Exception as e:
-                conn.rollback()
-                logging.error(f"Failed to insert documents in bulk: {e}")
-                raise
+        return self.database.insert_many(self.name, documents, validator=validator)
     
     def find(self, query: Optional[Union[Dict[str, Any], Query]] = None) -> List[Dict[str, Any]]:
         """Find documents in the collection."""
+        if not query:
+            return self._scan_all()
+        
         if isinstance(query, dict):
-            # Convert dict to Query object optimized for indexes
-            base_query = Query()
-            base_query.collection = self.name
-            base_query.database = self.database
-
-            # Handle full text search query with "*" field
-            if len(query) == 1 and "*" in query and isinstance(query["*"], dict) and "$contains" in query["*"]:
-                search_term = query["*"]["$contains"]
-                return self.search_text(search_term)
-            sorted_fields = []
-            indexes = self.database.list_indexes(self.name)
-            for index in indexes:
-                index_fields = index['fields']
-                if isinstance(index_fields, str):
-                    index_fields = json.loads(index_fields)
-                if isinstance(index_fields, list):
-                    for field in index_fields:
-                        if field in query and field not in sorted_fields:
-                            sorted_fields.append(field)
-            
-            remaining_fields = [f for f in query.keys() if f not in sorted_fields]
-            sorted_fields.extend(remaining_fields)
-
-            for field in sorted_fields:
-                value = query[field]
-                if isinstance(value, dict):
-                    for op, val in value.items():
-                        op = op.lstrip("$")
-                        if op == "gt":
-                            base_query.where(field, QueryOperator.GT, val)
-                        elif op == "gte":
-                            base_query.where(field, QueryOperator.GTE, val)
-                        elif op == "lt":
-                            base_query.where(field, QueryOperator.LT, val)
-                        elif op == "lte":
-                            base_query.where(field, QueryOperator.LTE, val)
-                        elif op == "ne":
-                            base_query.where(field, QueryOperator.NE, val)
-                        elif op == "in":
-                            base_query.where(field, QueryOperator.IN, val)
-                        elif op == "contains":
-                            base_query.where(field, QueryOperator.CONTAINS, val)
-                else:
-                    base_query.where(field, QueryOperator.EQ, value)
-            
-            return base_query.execute()
+            return self._find_dict(query)
 
         elif isinstance(query, Query):
             query.collection = self.name
             query.database = self.database
             return query.execute()
-        else:
-            base_query = Query()
-            base_query.collection = self.name
-            base_query.database = self.database
-            return base_query.execute()
+    
+    def find_iter(self, query: Optional[Union[Dict[str, Any], Query]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Find documents in the collection, yielding them as they are read.
+        
+        Unlike ``find`` no result list is built, so large result sets are decoded
+        batch by batch and iteration can stop early.
+        """
+        if not query:
+            return self.database._iter_conditions(self.name, [])
+        
+        if isinstance(query, dict):
+            if len(query) == 1 and "*" in query and isinstance(query["*"], dict) and "$contains" in query["*"]:
+                return iter(self.search_text(query["*"]["$contains"]))
+            conditions, residual = self._dict_to_conditions(query)
+            results = self.database._iter_conditions(self.name, conditions)
+            return filter(compile_matcher(residual), results) if residual else results
+        
+        query.collection = self.name
+        query.database = self.database
+        return self.database.execute_query_iter(query)
+    
+    def _scan_all(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the collection's documents directly, for queries without conditions."""
+        return self.database._fetch_documents(
+            self._scan_sql,
+            [limit or self.database.max_result_size],
+            single=limit == 1
+        )
+    
+    def _find_dict(self, query: Dict[str, Any], single: bool = False) -> List[Dict[str, Any]]:
+        """
+        Find documents matching a dict query.
+        
+        Args:
+            query: MongoDB-style dict query
+            single: Only the first matching document is needed
+        """
+        # Handle full text search query with "*" field
+        if len(query) == 1 and "*" in query and isinstance(query["*"], dict) and "$contains" in query["*"]:
+            search_term = query["*"]["$contains"]
+            return self.search_text(search_term, limit=1) if single else self.search_text(search_term)
+        conditions, residual = self._dict_to_conditions(query)
+        
+        if not residual:
+            return self.database._execute_conditions(self.name, conditions, limit=1 if single else None)
+        
+        # Rows are streamed through the Python-side predicates, so documents they
+        # reject are never collected
+        matcher = compile_matcher(residual)
+        results = self.database._iter_conditions(self.name, conditions)
+        if single:
+            # Stop reading at the first document passing the predicates
+            try:
+                match = next(filter(matcher, results), None)
+            finally:
+                results.close()
+            return [match] if match is not None else []
+        return list(filter(matcher, results))
+    
+    def _dict_to_conditions(self, query: Dict[str, Any]) -> Tuple[List[Tuple[str, QueryOperator, Any]], Dict[str, Any]]:
+        """
+        Translate a dict query into SQL conditions and a residual dict query.
+        
+        Indexed fields come first, ordered by selectivity once statistics were
+        gathered with ``Database.analyze``. The translation is planned once per
+        query shape and ranking of indexed fields, only the literal values are
+        bound per call. Residual predicates (regular expressions and ``*``
+        full-text search) must be checked in Python.
+        """
+        shape = tuple(
+            (field, tuple(value) if isinstance(value, dict) else None)
+            for field, value in query.items()
+        )
+        indexed_fields = self.database._ranked_index_fields(self.name)
+        template, residual_template = _query_template(shape, indexed_fields)
+        
+        conditions: List[Tuple[str, QueryOperator, Any]] = []
+        pushed_down = False
+        for field, operator, key in template:
+            value = query[field] if key is None else query[field][key]
+            if field == "*":
+                value = _text_prefilter_term(value)
+                if value is None:
+                    continue
+                # SQLite fully evaluates a lone $contains, see Database._full_text_condition
+                pushed_down = len(query[field]) == 1
+            conditions.append((field, operator, value))
+        
+        residual: Dict[str, Any] = {}
+        for field, key in residual_template:
+            if field == "*" and pushed_down:
+                continue
+            if key is None:
+                residual[field] = query[field]
+            else:
+                residual.setdefault(field, {})[key] = query[field][key]
+        return conditions, residual
     
     def find_one(self, query: Optional[Union[Dict[str, Any], Query]] = None) -> Optional[Dict[str, Any]]:
         """Find a single document in the collection."""
-        if query is None:
-            query = Query(self.name, self.database)
-            query.limit(1)
-            results = query.execute()
+        if not query:
+            results = self._scan_all(limit=1)
             return results[0] if results else None
         
         if isinstance(query, dict):
-            base_query = Query(self.name, self.database)
-            for field, value in query.items():
-                if isinstance(value, dict):
-                    for op, val in value.items():
-                        op = op.lstrip("$")
-                        if op == "gte":
-                            base_query.where(field, QueryOperator.GTE, val)
-                        elif op == "lte":
-                            base_query.where(field, QueryOperator.LTE, val)
-                        elif op == "in":
-                            base_query.where(field, QueryOperator.IN, val)
-                        elif op == "contains":
-                            base_query.where(field, QueryOperator.CONTAINS, val)
-                        else:
-                            base_query.where(field, QueryOperator.EQ, val)
-                else:
-                    base_query.where(field, QueryOperator.EQ, value)
-            base_query.limit(1)
-            results = base_query.execute()
+            results = self._find_dict(query, single=True)
             return results[0] if results else None
         
         # If it's already a Query object
@@ -265,12 +598,10 @@ class Collection:
             query.skip(skip)
             
         if sort:
-            sql_parts = []
             for field, direction in sort.items():
                 if direction.lower() not in ('asc', 'desc'):
                     raise ValueError("Sort direction must be 'asc' or 'desc'")
-                sql_parts.append(f"json_extract(data, '$.{field}') {direction.upper()}")
-            query.order_by(sql_parts)
+                query.sort(field, ascending=direction.lower() == 'asc')
             
         return query.execute()
 
@@ -284,65 +615,38 @@ class Collection:
         with self.database.pool.get_connection() as conn:
             cursor = conn.cursor()
             
-            if filter_query is None:
+            if not filter_query:
                 # Fast count without filtering
-                cursor.execute(
-                    "SELECT COUNT(*) FROM documents WHERE collection = ?",
-                    [self.name]
-                )
+                cursor.execute(self._count_sql)
             else:
-                # Convert filter to Query if needed
                 if isinstance(filter_query, dict):
-                    query = Query(self.name, self.database)
-                    for field, value in filter_query.items():
-                        if isinstance(value, dict):
-                            for op, val in value.items():
-                                op = op.lstrip("$")
-                                if op in ("gt", "lt", "gte", "lte", "ne"):
-                                    query.where(field, getattr(QueryOperator, op.upper()), val)
-                                elif op == "in":
-                                    query.where(field, QueryOperator.IN, val)
-                                elif op == "contains":
-                                    query.where(field, QueryOperator.CONTAINS, val)
-                        else:
-                            query.where(field, QueryOperator.EQ, value)
+                    query_conditions, residual = self._dict_to_conditions(filter_query)
+                    if residual:
+                        # Python-side predicates need the matching documents
+                        return len(self._find_dict(filter_query))
                 else:
-                    query = filter_query
+                    query_conditions = filter_query.conditions
                 
-                # Build and execute filtered count query
-                conditions = []
-                params = [self.name]
-                
-                for field, op, value in query.conditions:
-                    if value is None:
-                        conditions.append("json_extract(data, ?) IS NULL")
-                        params.append(f"$.{field}")
-                    else:
-                        if op == QueryOperator.CONTAINS:
-                            conditions.append("json_extract(data, ?) LIKE ?")
-                            params.extend([f"$.{field}", f"%{value}%"])
-                        elif op == QueryOperator.IN:
-                            placeholders = ','.join(['?' for _ in value])
-                            conditions.append(f"json_extract(data, ?) IN ({placeholders})")
-                            params.append(f"$.{field}")
-                            params.extend(value)
-                        else:
-                            op_map = {
-                                QueryOperator.EQ: "=",
-                                QueryOperator.GT: ">",
-                                QueryOperator.GTE: ">=",
-                                QueryOperator.LT: "<",
-                                QueryOperator.LTE: "<=",
-                                QueryOperator.NE: "!="
-                            }
-                            conditions.append(f"json_extract(data, ?) {op_map[op]} ?")
-                            params.extend([f"$.{field}", value])
-                
-                where_clause = " AND ".join(conditions) if conditions else "1"
-                cursor.execute(
-                    f"SELECT COUNT(*) FROM documents WHERE collection = ? AND {where_clause}",
-                    params
+                # Count SQL shares the plan cache with find, under its own shape key
+                database = self.database
+                shape = ("count", self.name) + tuple(
+                    database._condition_shape(field, op, value, self.name) for field, op, value in query_conditions
                 )
+                sql = database._cached_plan(shape)
+                if sql is None:
+                    where_clause = " AND ".join([
+                        f"{json_extract_sql(field)} IS NULL" if value is None
+                        else database._condition_sql(field, op, value, self.name)
+                        for field, op, value in query_conditions
+                    ]) or "1"
+                    sql = f"SELECT COUNT(*) FROM documents WHERE {database._collection_filter(self.name)} AND {where_clause}"
+                    database._remember_plan(shape, sql)
+                
+                params = []
+                for field, op, value in query_conditions:
+                    if value is not None:
+                        params += database._condition_params(field, op, value, self.name)
+                cursor.execute(sql, params)
             
             return cursor.fetchone()[0]
 
@@ -393,7 +697,7 @@ class Collection:
             # If we have FTS indexes, use them for the search
             if fts_indexes:
                 # Use the first FTS index
-                fts_table = fts_indexes[0]
+                fts_table = sql_identifier(fts_indexes[0])
                 
                 # Check if specific fields were requested
                 if fields:
@@ -435,23 +739,28 @@ class Collection:
                     """, [search_term, self.name, limit])
                 
                 # Process results
-                return [json.loads(row[0]) for row in cursor.fetchall()]
+                return [loads(row[0]) for row in cursor.fetchall()]
             
-            # Fallback: No FTS index, perform a full scan
-            # Get all documents first
-            all_docs = list(self.find({}))
+            # Fallback: No FTS index, scan the collection
+            term = str(search_term).lower()
+            prefilter = _text_prefilter_term(search_term)
+            if prefilter is not None and not fields:
+                # SQLite evaluates the whole search, only matches are decoded
+                cursor.execute(
+                    f"SELECT data FROM documents WHERE collection = ? AND {self.database._full_text_condition()} LIMIT ?",
+                    [self.name, prefilter, prefilter, limit]
+                )
+                return [loads(row[0]) for row in cursor]
+            elif prefilter is not None:
+                # Let SQLite discard non-matching rows before any decoding
+                cursor.execute(
+                    "SELECT data FROM documents WHERE collection = ? AND instr(lower(data), ?) > 0",
+                    [self.name, prefilter]
+                )
+                all_docs = [loads(row[0]) for row in cursor.fetchall()]
+            else:
+                all_docs = list(self.find({}))
             
-            def search_value(value: Any, term: str) -> bool:
-                """Recursively search through any value type for the search term."""
-                if isinstance(value, str):
-                    return term.lower() in value.lower()
-                elif isinstance(value, (int, float)):
-                    return term.lower() in str(value).lower()
-                elif isinstance(value, dict):
-                    return any(search_value(v, term) for v in value.values())
-                elif isinstance(value, (list, tuple)):
-                    return any(search_value(item, term) for item in value)
-                return False
             
             # If specific fields are requested, only search in those fields
             if fields:
@@ -468,15 +777,12 @@ class Collection:
                                 value = None
                                 break
                         
-                        if value is not None and search_value(value, search_term):
+                        if value is not None and search_value(value, term):
                             results.append(doc)
                             break
             else:
                 # Search in all fields
-                results = [
-                    doc for doc in all_docs 
-                    if any(search_value(value, search_term) for value in doc.values())
-                ]
+                results = [doc for doc in all_docs if search_value(doc, term)]
             
             return results[:limit]
     
@@ -7,21 +7,33 @@ import time
 class ConnectionPool:
     """A thread-safe connection pool for SQLite connections."""
     
-    def __init__(self, db_path: str, max_connections: int = 10):
+    def __init__(self, db_path: str, max_connections: int = 10, cache_mb: int = 64, mmap_mb: int = 256,
+                 statement_cache_size: int = 256):
         """
         Initialize a new connection pool.
         
         Args:
             db_path: Path to the SQLite database file
             max_connections: Maximum number of concurrent connections
+            cache_mb: Page cache size per connection in megabytes
+            mmap_mb: Memory-mapped I/O size per connection in megabytes
+            statement_cache_size: Prepared statements kept per connection
         """
         self.db_path = db_path
         self.max_connections = max_connections
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self.statement_cache_size = statement_cache_size
         self.connection_timeout = 30  # seconds
+        self.busy_timeout_ms = 5000  # Wait for locks held by other connections
+        self.journal_size_limit = 64 * 1024 * 1024  # Truncate the WAL after checkpoints
         self.max_connection_age = 3600  # 1 hour
         self._connections = {}
         self._active_connections = set()  # Track active connection IDs
+        self._leases: Dict[int, int] = {}  # Open get_connection blocks per thread
         self._lock = threading.Lock()
+        # Held by the one thread writing at a time, readers never take it
+        self.write_lock = threading.RLock()
         self._connection_timestamps = {}
     
     @contextmanager
@@ -43,12 +55,11 @@ class ConnectionPool:
                 raise Exception("Connection pool exhausted")
             
             if thread_id not in self._connections:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                self._connections[thread_id] = conn
+                self._connections[thread_id] = self._create_connection()
                 self._connection_timestamps[thread_id] = time.time()
             
             self._active_connections.add(conn_id)
+            self._leases[thread_id] = self._leases.get(thread_id, 0) + 1
         
         try:
             yield self._connections[thread_id]
@@ -56,15 +67,58 @@ class ConnectionPool:
             with self._lock:
                 if conn_id in self._active_connections:
                     self._active_connections.remove(conn_id)
+                if self._leases.get(thread_id, 0) > 1:
+                    self._leases[thread_id] -= 1
+                else:
+                    self._leases.pop(thread_id, None)
                 
                 current_time = time.time()
                 if current_time - self._connection_timestamps[thread_id] > self.max_connection_age:
                     self._connections[thread_id].close()
-                    conn = sqlite3.connect(self.db_path)
-                    conn.row_factory = sqlite3.Row
-                    self._connections[thread_id] = conn
+                    self._connections[thread_id] = self._create_connection()
                     self._connection_timestamps[thread_id] = current_time
     
+    def holds_connection(self) -> bool:
+        """Whether the calling thread is inside a ``get_connection`` block."""
+        return threading.get_ident() in self._leases
+    
+    @contextmanager
+    def writer(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Get this thread's connection for writing.
+        
+        SQLite allows a single writer at a time. Writers from this process queue
+        on ``write_lock`` instead of retrying SQLITE_BUSY in the busy handler,
+        while readers keep using their own connections concurrently under WAL.
+        
+        Raises:
+            sqlite3.OperationalError: If the write lock is not acquired within
+                ``connection_timeout`` seconds
+        """
+        if not self.write_lock.acquire(timeout=self.connection_timeout):
+            raise sqlite3.OperationalError("database is locked")
+        try:
+            with self.get_connection() as conn:
+                yield conn
+        finally:
+            self.write_lock.release()
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection with the pool's performance settings applied."""
+        conn = sqlite3.connect(self.db_path, cached_statements=self.statement_cache_size)
+        conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA journal_size_limit={int(self.journal_size_limit)}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_mb) * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_mb) * 1024 * 1024}")
+        # Set once here rather than per query, since any PRAGMA expires cached statements
+        conn.execute("PRAGMA read_uncommitted = ON")
+        return conn
+    
     def close_all(self):
         """Close all connections in the pool."""
         with self._lock:
@@ -76,6 +130,7 @@ class ConnectionPool:
             self._connections.clear()
             self._connection_timestamps.clear()
             self._active_connections.clear()
+            self._leases.clear()
     
     def _check_connection_health(self, conn: sqlite3.Connection) -> bool:
         """Check if connection is healthy."""
@@ -1,66 +1,129 @@
 import sqlite3
 import json
-from typing import Dict, List, Any, Union, Optional, Tuple
+import logging
+from typing import Callable, Dict, Iterator, List, Any, Union, Optional, Tuple
 from .connection_pool import ConnectionPool
 from .collection import Collection
 from ..query import Query, QueryOperator
 from ..operations import BulkOperations
 from ..aggregations import Aggregations, AggregateFunction
+from ..utils.ids import new_id
+from ..utils.paths import json_extract_sql, json_update_path_sql, sql_identifier, sql_json_path, sql_string
+from ..utils.serialization import dumps, loads
+import contextvars
 import functools
 import hashlib
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from operator import itemgetter
+
+# Maximum number of query shapes kept in the SQL plan cache, and of prepared
+# statements kept per connection so cached SQL also skips re-preparation
+PLAN_CACHE_SIZE = 256
+
+# Rows fetched and decoded per batch when reading query results
+FETCH_BATCH_SIZE = 1000
+_first_column = itemgetter(0)
+
+# Index name and constraints of an EXPLAIN QUERY PLAN step, e.g.
+# "SEARCH documents USING INDEX idx_users_age (collection=? AND <expr>>?)"
+_PLAN_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\S+)(?: \((.*)\))?")
+
+# Index names are limited to plain identifier characters before they reach DDL
+_INDEX_NAME = re.compile(r"^[A-Za-z0-9_]+$")
+
+# Value types bound directly in json_set; SQLite would store booleans as 0/1
+_JSON_SCALARS = (str, int, float, type(None))
+
+# SQL comparison per dict operator in update and delete queries
+_WHERE_COMPARISONS = {"gt": ">", "lt": "<", "gte": ">=", "lte": "<=", "ne": "!="}
+
+# SQL comparison per QueryOperator in find and count conditions
+_CONDITION_COMPARISONS = {
+    QueryOperator.GT: ">",
+    QueryOperator.GTE: ">=",
+    QueryOperator.LT: "<",
+    QueryOperator.LTE: "<=",
+    QueryOperator.NE: "!=",
+}
 
 class Database:
     """NoSQL-like database interface using SQLite as backend."""
     
-    def __init__(self, db_path: str, max_connections: int = 10, max_result_size: int = 10000, debug: bool = False):
-        """Initialize database with connection pool."""
+    def __init__(self, db_path: str, max_connections: int = 10, max_result_size: int = 10000, debug: bool = False,
+                 cache_mb: int = 64, mmap_mb: int = 256):
+        """
+        Initialize database with connection pool.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            max_connections: Maximum number of concurrent connections
+            max_result_size: Maximum number of documents returned by a query
+            debug: Print query plan diagnostics
+            cache_mb: SQLite page cache size per connection in megabytes
+            mmap_mb: SQLite memory-mapped I/O size per connection in megabytes
+        """
         self.db_path = db_path
         try:
-            self.pool = ConnectionPool(db_path, max_connections)
+            self.pool = ConnectionPool(db_path, max_connections, cache_mb, mmap_mb,
+                                       statement_cache_size=PLAN_CACHE_SIZE)
         except sqlite3.Error as e:
             raise RuntimeError(f"Failed to initialize database connection pool: {e}")
         self.max_result_size = max_result_size
         self.debug = debug
         self._init_db()
         self._collections: Dict[str, Collection] = {}
+        self._plan_cache: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._plan_cache_lock = threading.Lock()
+        # Index metadata per collection, dropped whenever an index is created or removed
+        self._index_cache: Dict[str, List[Dict[str, Any]]] = {}
+        self._ranked_fields_cache: Dict[str, Tuple[str, ...]] = {}
+        self._index_cache_version = 0
+        # Connection of the transaction() block running in the current context
+        self._transaction_conn: "contextvars.ContextVar[Optional[sqlite3.Connection]]" = \
+            contextvars.ContextVar(f"zenithdb_transaction_{id(self)}", default=None)
+        # Workers for query_many, started on first use and each reading through its own connection
+        self._query_executor: Optional[ThreadPoolExecutor] = None
+        self._query_executor_lock = threading.Lock()
     
     def collection(self, name: str) -> Collection:
         """
         Get or create a collection interface.
         Returns cached collection instance if it exists, otherwise creates new one.
         """
-        if name not in self._collections:
-            self._collections[name] = Collection(self, name)
-        return self._collections[name]
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = Collection(self, name)
+        return collection
     
     def list_collections(self) -> List[str]:
         """Get list of all collection names in the database."""
         with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT name FROM collections ORDER BY name")
-            return sorted([row[0] for row in cursor.fetchall()])
+            return [row[0] for row in conn.execute("SELECT name FROM collections ORDER BY name")]
 
     def count_collections(self) -> int:
         """Get count of all collections in the database."""
         with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM collections")
-            return cursor.fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM collections").fetchone()[0]
 
     def drop_all_collections(self) -> None:
         """Drop all collections in the database."""
-        with self.pool.get_connection() as conn:
+        with self._write_transaction() as conn:
             conn.execute("DELETE FROM collections")
             conn.execute("DELETE FROM documents")
             conn.execute("DELETE FROM indexes")
-            conn.commit()
+        self._collections.clear()
+        self._invalidate_index_cache()
     
     def drop_collection(self, name: str) -> None:
         """
         Drop a collection and all its documents.
         Also removes any associated indexes.
         """
-        with self.pool.get_connection() as conn:
+        with self._write_transaction() as conn:
             # Delete collection metadata
             conn.execute("DELETE FROM collections WHERE name = ?", [name])
             
@@ -70,17 +133,17 @@ class Database:
             # Delete associated indexes
             indexes = self.list_indexes(name)
             for index in indexes:
-                self.drop_index(index['name'])
-            
-            # Remove from cache
-            if name in self._collections:
-                try:
-                    del self._collections[name]
-                except KeyError:
-                    # Collection not found in cache, ignore
-                    pass
-            
-            conn.commit()
+                self._drop_index_objects(conn, index['name'])
+            conn.execute("DELETE FROM indexes WHERE collection = ?", [name])
+        self._invalidate_index_cache()
+        
+        # Remove from cache
+        if name in self._collections:
+            try:
+                del self._collections[name]
+            except KeyError:
+                # Collection not found in cache, ignore
+                pass
 
     def print_everything(self) -> List[Dict]:
         """Print and return all database contents in a readable format."""
@@ -100,7 +163,7 @@ class Database:
                     'name': row[0],
                     'created_at': row[1],
                     'updated_at': row[2],
-                    'metadata': json.loads(row[3]) if row[3] else None
+                    'metadata': loads(row[3]) if row[3] else None
                 }
                 for row in cursor.fetchall()
             ]
@@ -115,7 +178,7 @@ class Database:
                 {
                     'collection': row[0],
                     'id': row[1],
-                    'data': json.loads(row[2]),
+                    'data': loads(row[2]),
                     'created_at': row[3],
                     'updated_at': row[4]
                 }
@@ -132,7 +195,7 @@ class Database:
                 {
                     'name': row[0],
                     'collection': row[1],
-                    'fields': json.loads(row[2]),
+                    'fields': loads(row[2]),
                     'type': row[3],
                     'unique': bool(row[4])
                 }
@@ -144,10 +207,93 @@ class Database:
                 unique_str = " (unique)" if idx['unique'] else ""
                 print(f"  - {idx['name']}: {idx['collection']}.{idx['fields']}{unique_str}")
             
-            conn.commit()
-            
         return results
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run many inserts, updates and deletes in one transaction.
+        
+        Operations inside the block reuse one connection and skip their own
+        commits; everything is committed once on exit, or rolled back if the
+        block raises. Nested blocks join the outer transaction.
+        
+        Usage:
+            with db.transaction():
+                users.insert({"name": "John"})
+                users.update({"name": "John"}, {"$set": {"age": 30}})
+        """
+        conn = self._transaction_conn.get()
+        if conn is not None:
+            yield conn
+            return
+        
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            token = self._transaction_conn.set(conn)
+            index_version = self._index_cache_version
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._transaction_conn.reset(token)
+                # Plans and index lists cached while indexes changed may not match what was kept
+                if self._index_cache_version != index_version:
+                    self._invalidate_index_cache()
+    
+    @contextmanager
+    def _connection(self):
+        """Get the connection of the active transaction, or one from the pool."""
+        conn = self._transaction_conn.get()
+        if conn is not None:
+            yield conn
+        else:
+            with self.pool.get_connection() as conn:
+                yield conn
+    
+    @contextmanager
+    def _writer(self):
+        """Get the connection of the active transaction, or one from the pool holding its write lock."""
+        conn = self._transaction_conn.get()
+        if conn is not None:
+            yield conn
+        else:
+            with self.pool.writer() as conn:
+                yield conn
+    
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Run schema and metadata writes atomically.
+        
+        Inside a transaction() block the writes go into a savepoint, so they are
+        undone with the block instead of committing it early; otherwise they get
+        a transaction of their own.
+        """
+        conn = self._transaction_conn.get()
+        if conn is None:
+            with self.transaction() as conn:
+                yield conn
+            return
+        
+        conn.execute("SAVEPOINT zenithdb_write")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO zenithdb_write")
+            conn.execute("RELEASE zenithdb_write")
+            raise
+        else:
+            conn.execute("RELEASE zenithdb_write")
+    
+    def _in_transaction(self) -> bool:
+        """Whether a transaction() block is active, so single operations must not commit."""
+        return self._transaction_conn.get() is not None
+    
     def bulk_operations(self) -> BulkOperations:
         """Get bulk operations interface."""
         with self.pool.get_connection() as conn:
@@ -159,10 +305,7 @@ class Database:
         """Initialize database schema with proper transaction handling."""
         with self.pool.get_connection() as conn:
             try:
-                # Set PRAGMA settings outside transaction
-                conn.execute("PRAGMA journal_mode=WAL")
-                conn.execute("PRAGMA synchronous=NORMAL")
-                
+                # PRAGMA settings are applied by the pool on every connection
                 # Create schema in transaction
                 conn.execute("BEGIN")
                 conn.execute("""
@@ -170,9 +313,14 @@ class Database:
                         name TEXT PRIMARY KEY,
                         metadata TEXT DEFAULT '{}',
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        validator TEXT
                     )
                 """)
+                # Databases created before validators got their own column
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(collections)")}
+                if "validator" not in columns:
+                    conn.execute("ALTER TABLE collections ADD COLUMN validator TEXT")
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS documents (
                         id TEXT PRIMARY KEY,
@@ -212,137 +360,223 @@ class Database:
         Args:
             collection: Collection name
             fields: Field or fields to index
-            index_type: Type of index (btree, hash, etc.)
+            index_type: Type of index (btree, hash, etc.); ``"fts"`` creates a
+                trigram FTS5 index that speeds up ``$contains`` on the fields
             unique: Whether the index should enforce uniqueness
             full_text: Whether to create a full-text search index
         """
         if isinstance(fields, str):
             fields = [fields]
+        text_index = index_type == "fts" and not full_text
         
         # Generate index name
         safe_fields = [field.replace('.', '_') for field in fields]
-        index_prefix = "fts_" if full_text else "idx_"
+        index_prefix = "fts_" if full_text else "txt_" if text_index else "idx_"
         index_name = f"{index_prefix}{collection}_{'_'.join(safe_fields)}"
+        if not _INDEX_NAME.match(index_name):
+            raise sqlite3.OperationalError(f"Invalid index name: {index_name!r}")
         
-        with self.pool.get_connection() as conn:
-            try:
-                conn.execute("BEGIN")
+        # Names and the collection filter are part of DDL, which takes no parameters,
+        # so they are also rendered as quoted identifiers and an escaped literal
+        table = sql_identifier(index_name)
+        collection_literal = sql_string(collection)
+        columns = ', '.join(sql_identifier(field) for field in safe_fields)
+        
+        with self._write_transaction() as conn:
+            if full_text or text_index:
+                # For full-text search, we need to create a virtual table
+                # and keep it in sync with the documents table
                 
-                if full_text:
-                    # For full-text search, we need to create a virtual table
-                    # and keep it in sync with the documents table
-                    
-                    # Check if FTS5 module is available
-                    try:
-                        conn.execute("SELECT sqlite_source_id()")
-                        sqlite_version = conn.execute("SELECT sqlite_version()").fetchone()[0]
-                        has_fts5 = sqlite_version >= "3.9.0"
-                    except:
-                        has_fts5 = False
-                    
-                    fts_version = "fts5" if has_fts5 else "fts4"
-                    
-                    # Create the virtual table
-                    field_definitions = ', '.join(f"{field.replace('.', '_')}" for field in fields)
+                # Check if FTS5 module is available
+                try:
+                    conn.execute("SELECT sqlite_source_id()")
+                    sqlite_version = conn.execute("SELECT sqlite_version()").fetchone()[0]
+                    has_fts5 = sqlite_version >= "3.9.0"
+                except:
+                    has_fts5 = False
+                
+                fts_version = "fts5" if has_fts5 else "fts4"
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [index_name]
+                ).fetchone() is not None
+                
+                # Create the virtual table. Substring indexes tokenize into trigrams,
+                # which answer the same matches as LIKE '%term%'
+                if text_index:
                     conn.execute(f"""
-                        CREATE VIRTUAL TABLE IF NOT EXISTS {index_name} 
-                        USING {fts_version}(collection, id, {field_definitions}, tokenize=porter)
+                        CREATE VIRTUAL TABLE IF NOT EXISTS {table}
+                        USING fts5(collection UNINDEXED, id UNINDEXED, {columns}, tokenize=trigram)
                     """)
-                    
-                    # Insert existing data
+                    conn.execute("""
+                        INSERT OR REPLACE INTO indexes
+                        (name, collection, fields, type, unique_index, created_at)
+                        VALUES (?, ?, ?, 'fts', 0, CURRENT_TIMESTAMP)
+                    """, (index_name, collection, dumps(fields)))
+                else:
+                    conn.execute(f"""
+                        CREATE VIRTUAL TABLE IF NOT EXISTS {table} 
+                        USING {fts_version}(collection, id, {columns}, tokenize=porter)
+                    """)
+                
+                # Insert existing data, unless the index already holds it.
+                # Each row is stored under the rowid of its document, so the
+                # triggers find it by rowid instead of scanning the UNINDEXED id column
+                if not exists:
                     field_extracts = []
                     for field in fields:
-                        extract = f"json_extract(data, '$.{field}')"
-                        field_extracts.append(extract)
+                        field_extracts.append(json_extract_sql(field))
                     
                     conn.execute(f"""
-                        INSERT INTO {index_name} (collection, id, {', '.join(safe_fields)})
-                        SELECT collection, id, {', '.join(field_extracts)}
+                        INSERT INTO {table} (rowid, collection, id, {columns})
+                        SELECT rowid, collection, id, {', '.join(field_extracts)}
                         FROM documents
                         WHERE collection = ?
                     """, [collection])
-                    
-                    # Create triggers to keep the FTS index in sync
-                    # Insert trigger
-                    conn.execute(f"""
-                        CREATE TRIGGER IF NOT EXISTS {index_name}_insert AFTER INSERT ON documents
-                        WHEN new.collection = '{collection}'
-                        BEGIN
-                            INSERT INTO {index_name} (collection, id, {', '.join(safe_fields)})
-                            VALUES (new.collection, new.id, {', '.join(f"json_extract(new.data, '$.{field}')" for field in fields)});
-                        END
-                    """)
-                    
-                    # Update trigger
-                    conn.execute(f"""
-                        CREATE TRIGGER IF NOT EXISTS {index_name}_update AFTER UPDATE ON documents
-                        WHEN new.collection = '{collection}'
-                        BEGIN
-                            DELETE FROM {index_name} WHERE id = old.id;
-                            INSERT INTO {index_name} (collection, id, {', '.join(safe_fields)})
-                            VALUES (new.collection, new.id, {', '.join(f"json_extract(new.data, '$.{field}')" for field in fields)});
-                        END
-                    """)
-                    
-                    # Delete trigger
-                    conn.execute(f"""
-                        CREATE TRIGGER IF NOT EXISTS {index_name}_delete AFTER DELETE ON documents
-                        WHEN old.collection = '{collection}'
-                        BEGIN
-                            DELETE FROM {index_name} WHERE id = old.id;
-                        END
-                    """)
-                else:
-                    # Traditional index
-                    # Store index metadata
-                    conn.execute("""
-                        INSERT OR REPLACE INTO indexes 
-                        (name, collection, fields, type, unique_index, created_at) 
-                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (index_name, collection, json.dumps(fields), index_type, int(unique)))
-                    
-                    # Create the actual SQLite index
-                    field_exprs = []
-                    for field in fields:
-                        if '.' in field:
-                            # Handle nested fields
-                            expr = f"json_extract(data, '$.{field}')"
-                        else:
-                            expr = f"json_extract(data, '$.{field}')"
-                        field_exprs.append(expr)
-                    
-                    # Create index with uniqueness constraint if specified
-                    # Note: Collection name is hardcoded in WHERE clause since SQLite doesn't allow parameters there
-                    index_sql = f"""
-                        CREATE {'UNIQUE' if unique else ''} INDEX IF NOT EXISTS {index_name}
-                        ON documents({', '.join(['collection'] + field_exprs)})
-                        WHERE collection = '{collection}'
-                    """
-                    conn.execute(index_sql)
                 
-                conn.commit()
-                return index_name
+                # Create triggers to keep the FTS index in sync
+                # Insert trigger
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {sql_identifier(index_name + '_insert')} AFTER INSERT ON documents
+                    WHEN new.collection = {collection_literal}
+                    BEGIN
+                        INSERT INTO {table} (rowid, collection, id, {columns})
+                        VALUES (new.rowid, new.collection, new.id, {', '.join(json_extract_sql(field, 'new.data') for field in fields)});
+                    END
+                """)
                 
-            except sqlite3.Error as e:
-                conn.rollback()
-                raise  # Re-raise the original error to preserve error type
+                # Update trigger
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {sql_identifier(index_name + '_update')} AFTER UPDATE ON documents
+                    WHEN new.collection = {collection_literal}
+                    BEGIN
+                        DELETE FROM {table} WHERE rowid = old.rowid;
+                        INSERT INTO {table} (rowid, collection, id, {columns})
+                        VALUES (new.rowid, new.collection, new.id, {', '.join(json_extract_sql(field, 'new.data') for field in fields)});
+                    END
+                """)
+                
+                # Delete trigger
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {sql_identifier(index_name + '_delete')} AFTER DELETE ON documents
+                    WHEN old.collection = {collection_literal}
+                    BEGIN
+                        DELETE FROM {table} WHERE rowid = old.rowid;
+                    END
+                """)
+            else:
+                # Traditional index
+                # Store index metadata
+                conn.execute("""
+                    INSERT OR REPLACE INTO indexes 
+                    (name, collection, fields, type, unique_index, created_at) 
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, (index_name, collection, dumps(fields), index_type, int(unique)))
+                
+                # Create the actual SQLite index
+                field_exprs = [json_extract_sql(field) for field in fields]
+                
+                # Create index with uniqueness constraint if specified
+                index_sql = f"""
+                    CREATE {'UNIQUE' if unique else ''} INDEX IF NOT EXISTS {table}
+                    ON documents({', '.join(['collection'] + field_exprs)})
+                    WHERE collection = {collection_literal}
+                """
+                conn.execute(index_sql)
+            
+        self._invalidate_index_cache()
+        return index_name
     
     def list_indexes(self, collection: str = None) -> List[Dict[str, Any]]:
-        """List all indexes or indexes for a specific collection."""
-        with self.pool.get_connection() as conn:
+        """
+        List all indexes or indexes for a specific collection.
+        
+        The indexes of a collection are cached until an index is created or dropped
+        through this Database, so query planning can look them up on every query.
+        """
+        # Inside a transaction the indexes may differ from what other connections see
+        cacheable = collection and not self._in_transaction()
+        if cacheable:
+            cached = self._index_cache.get(collection)
+            if cached is not None:
+                return list(cached)
+        version = self._index_cache_version
+        
+        with self._connection() as conn:
             cursor = conn.cursor()
             if collection:
                 cursor.execute("SELECT * FROM indexes WHERE collection = ?", [collection])
             else:
                 cursor.execute("SELECT * FROM indexes")
             
-            return [{
+            indexes = [{
                 'name': row[0],
                 'collection': row[1],
-                'fields': json.loads(row[2]),
+                'fields': loads(row[2]),
                 'type': row[3],
                 'unique': bool(row[4])
             } for row in cursor]
+        
+        # Only cache if no index changed while the rows were being read
+        if cacheable and version == self._index_cache_version:
+            self._index_cache[collection] = indexes
+        return list(indexes)
+    
+    def _invalidate_index_cache(self) -> None:
+        """Forget cached index metadata after an index was created or dropped."""
+        self._index_cache_version += 1
+        self._index_cache.clear()
+        self._ranked_fields_cache.clear()
+        # Cached plans may be missing a newly usable index or name a dropped one
+        with self._plan_cache_lock:
+            self._plan_cache.clear()
+    
+    def _ranked_index_fields(self, collection: str) -> Tuple[str, ...]:
+        """
+        Get the indexed fields of a collection, most selective first.
+        
+        Selectivity is the average number of rows per value of an index's leading
+        field, as recorded in sqlite_stat1 by analyze(). Fields without statistics
+        follow in index declaration order.
+        """
+        cached = self._ranked_fields_cache.get(collection)
+        if cached is not None:
+            return cached
+        version = self._index_cache_version
+        indexes = self.list_indexes(collection)
+        
+        with self.pool.get_connection() as conn:
+            try:
+                stats = dict(conn.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'documents'").fetchall())
+            except sqlite3.OperationalError:
+                stats = {}  # ANALYZE has never run
+        
+        fields: List[str] = []
+        rows_per_value: Dict[str, int] = {}
+        for index in indexes:
+            index_fields = index['fields'] if isinstance(index['fields'], list) else [index['fields']]
+            fields.extend(field for field in index_fields if field not in fields)
+            # Stats read "<rows> <rows per collection> <rows per leading field> ..."
+            stat = (stats.get(index['name']) or "").split()
+            if len(stat) > 2 and stat[2].isdigit():
+                leading = index_fields[0]
+                rows_per_value[leading] = min(int(stat[2]), rows_per_value.get(leading, int(stat[2])))
+        
+        ranked = tuple(sorted(fields, key=lambda field: rows_per_value.get(field, float("inf"))))
+        if version == self._index_cache_version:
+            self._ranked_fields_cache[collection] = ranked
+        return ranked
+    
+    def analyze(self) -> None:
+        """
+        Gather index statistics with ANALYZE.
+        
+        Besides helping SQLite's planner, the statistics are used to put the most
+        selective indexed fields first when translating dict queries. Run it again
+        after large changes to the data.
+        """
+        with self._write_transaction() as conn:
+            conn.execute("ANALYZE")
+        self._invalidate_index_cache()
     
     def drop_index(self, index_name: str):
         """
@@ -351,169 +585,397 @@ class Database:
         Args:
             index_name: Name of the index to drop
         """
-        with self.pool.get_connection() as conn:
-            try:
-                conn.execute("BEGIN")
-                
-                # Check if it's a FTS index
-                if index_name.startswith("fts_"):
-                    # Drop the FTS virtual table
-                    conn.execute(f"DROP TABLE IF EXISTS {index_name}")
-                    
-                    # Drop the associated triggers
-                    conn.execute(f"DROP TRIGGER IF EXISTS {index_name}_insert")
-                    conn.execute(f"DROP TRIGGER IF EXISTS {index_name}_update")
-                    conn.execute(f"DROP TRIGGER IF EXISTS {index_name}_delete")
-                else:
-                    # Drop regular index
-                    conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        try:
+            with self._write_transaction() as conn:
+                self._drop_index_objects(conn, index_name)
                 
                 # Remove from indexes table
                 conn.execute("DELETE FROM indexes WHERE name = ?", [index_name])
-                
-                conn.commit()
-            except sqlite3.Error as e:
-                conn.rollback()
-                raise RuntimeError(f"Failed to drop index {index_name}: {e}")
+        except sqlite3.Error as e:
+            raise RuntimeError(f"Failed to drop index {index_name}: {e}")
+        self._invalidate_index_cache()
+    
+    def _drop_index_objects(self, conn: sqlite3.Connection, index_name: str) -> None:
+        """Drop the SQLite index, or the FTS table and its triggers, behind an index."""
+        # Check if it's a FTS index
+        if index_name.startswith(("fts_", "txt_")):
+            # Drop the FTS virtual table
+            conn.execute(f"DROP TABLE IF EXISTS {sql_identifier(index_name)}")
+            
+            # Drop the associated triggers
+            for suffix in ("_insert", "_update", "_delete"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {sql_identifier(index_name + suffix)}")
+        else:
+            # Drop regular index
+            conn.execute(f"DROP INDEX IF EXISTS {sql_identifier(index_name)}")
     
     def insert(self, collection: str, document: Dict[str, Any], doc_id: Optional[str] = None) -> str:
-        """Insert a document into a collection."""
-        with self.pool.get_connection() as conn:
-            conn.execute("BEGIN IMMEDIATE")
+        """
+        Insert a document into a collection.
+        
+        A single document is written with one INSERT statement; the batching and
+        index deferral of BulkOperations only pay off for many documents.
+        """
+        doc_id = doc_id or new_id()
+        document['_id'] = doc_id
+        in_transaction = self._in_transaction()
+        with self._writer() as conn:
             try:
+                conn.execute(
+                    "INSERT INTO documents (id, collection, data) VALUES (?, ?, ?)",
+                    (doc_id, collection, dumps(document))
+                )
+                if not in_transaction:
+                    conn.commit()
+                return doc_id
+            except Exception as e:
+                if not in_transaction:
+                    conn.rollback()
+                raise e
+    
+    def insert_many(self, collection: str, documents: List[Dict[str, Any]],
+                    doc_ids: Optional[List[str]] = None,
+                    validator: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[str]:
+        """
+        Insert documents into a collection in one transaction.
+        
+        Rows are written by BulkOperations.bulk_insert as multi-row VALUES
+        statements. Validation runs in the same pass as serialization; a rejected
+        document rolls back the whole batch. Inside transaction() the batch runs in
+        a savepoint, so a rejected batch leaves the enclosing transaction intact.
+        """
+        if not documents:
+            return []
+        
+        if self._in_transaction():
+            with self._connection() as conn:
                 ops = BulkOperations(conn)
-                doc_id = ops.bulk_insert(collection, [document], [doc_id] if doc_id else None)[0]
+                ops._transaction_active = True  # The enclosing transaction owns commit and rollback
+                conn.execute("SAVEPOINT insert_many")
+                try:
+                    return ops.bulk_insert(collection, documents, doc_ids, validator)
+                except Exception:
+                    conn.execute("ROLLBACK TO insert_many")
+                    raise
+                finally:
+                    conn.execute("RELEASE insert_many")
+        
+        with self.pool.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                doc_ids = BulkOperations(conn).bulk_insert(collection, documents, doc_ids, validator)
                 conn.commit()
-                return doc_id
+                return doc_ids
+            except ValueError:
+                conn.rollback()
+                raise
             except Exception as e:
                 conn.rollback()
-                raise e
+                logging.error(f"Failed to insert documents in bulk: {e}")
+                raise
     
     def check_index_usage(self, sql: str, params: List[Any] = None) -> bool:
-        """Check if a query is using indexes and print the execution plan."""
+        """
+        Check if a query is using indexes and print the execution plan.
+        
+        A query counts as indexed when a plan step searches an index on more than
+        the collection filter.
+        """
         with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get the execution plan
-            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or [])
-            plan = cursor.fetchall()
-            
-            # Parse the query plan
-            using_index = False
-            current_index = None
-            
-            for row in plan:
-                detail = row[3]
-                if "USING INDEX" in detail:
-                    # Extract index name and conditions
-                    parts = detail.split("USING INDEX")
-                    index_name = parts[1].split()[0]
-                    conditions = parts[1].split("(")[1].split(")")[0]
-                    
-                    # Check if it's using more than just the collection index
-                    if len(conditions.split("AND")) > 1:
-                        using_index = True
-                        current_index = index_name
-            
-            if self.debug:  # Only print if debug mode is enabled
-                if using_index:
-                    print(f"✓ Using index: {current_index}")
-                else:
-                    print("✗ No index used - table scan")
-            
-            return using_index
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or []).fetchall()
+        
+        using_index = False
+        current_index = None
+        for row in plan:
+            match = _PLAN_INDEX.search(row[3])
+            if match and match.group(2) and len(match.group(2).split(" AND ")) > 1:
+                using_index = True
+                current_index = match.group(1)
+        
+        if self.debug:  # Only print if debug mode is enabled
+            if using_index:
+                print(f"✓ Using index: {current_index}")
+            else:
+                print("✗ No index used - table scan")
+        
+        return using_index
     
     def execute_query(self, query: 'Query') -> List[Dict[str, Any]]:
         """Execute a query and return results with optimized execution."""
-        conditions = []
-        params = []
+        sql, params = query.compile(self)
+        return self._fetch_documents(sql, params, single=query.limit_value == 1)
+    
+    def query_many(self, queries: List['Query']) -> List[List[Dict[str, Any]]]:
+        """
+        Execute independent queries in parallel and return their results in order.
         
-        # Add collection condition first for better index usage
-        conditions.append("collection = ?")
-        params.append(query.collection)
-        
-        for field, op, value in query.conditions:
-            if value is None:
-                conditions.append("""(
-                    json_extract(data, ?) IS NULL 
-                    AND json_type(data, ?) IS NOT NULL
-                )""")
-                params.extend([f"$.{field}", f"$.{field}"])
-                continue
-                
-            if op == QueryOperator.CONTAINS:
-                conditions.append(f"json_extract(data, '$.{field}') LIKE ?")
-                params.append(f"%{value}%")
-            elif op == QueryOperator.EQ:
-                if field == "_id":
-                    conditions.append("id = ?")
-                    params.append(value)
-                else:
-                    conditions.append(f"json_extract(data, '$.{field}') = ?")
-                    params.append(value)
-            elif op == QueryOperator.REGEX:
-                conditions.append(f"json_extract(data, '$.{field}') REGEXP ?")
-                params.append(value)
-            elif op == QueryOperator.STARTS_WITH:
-                conditions.append(f"json_extract(data, '$.{field}') LIKE ?")
-                params.append(f"{value}%")
-            elif op == QueryOperator.ENDS_WITH:
-                conditions.append(f"json_extract(data, '$.{field}') LIKE ?")
-                params.append(f"%{value}")
-            elif op == QueryOperator.BETWEEN:
-                conditions.append(f"json_extract(data, '$.{field}') BETWEEN ? AND ?")
-                params.extend(value)  # value should be a list of [start, end]
-            elif op == QueryOperator.IN:
-                placeholders = ','.join(['?' for _ in value])
-                conditions.append(f"json_extract(data, '$.{field}') IN ({placeholders})")
-                params.extend(value)
-            else:
-                op_map = {
-                    QueryOperator.GT: ">",
-                    QueryOperator.GTE: ">=",
-                    QueryOperator.LT: "<",
-                    QueryOperator.LTE: "<=",
-                    QueryOperator.NE: "!=",
-                }
-                conditions.append(f"json_extract(data, '$.{field}') {op_map[op]} ?")
-                params.append(value)
+        Each worker thread reads through its own pooled connection, and WAL lets
+        those readers run concurrently. The queries run one after another in the
+        calling thread instead when the workers' connections would be wrong or
+        short: for in-memory databases, which are private to each connection,
+        inside a transaction, whose uncommitted writes only its connection sees,
+        and while the thread holds a pooled connection itself.
         
-        where_clause = " AND ".join(conditions)
-        limit_clause = f"LIMIT {query.limit_value}" if query.limit_value else "LIMIT 10000"
-        offset_clause = f"OFFSET {query.skip_value}" if query.skip_value else "OFFSET 0"
+        Args:
+            queries: Queries with their collection set
+        """
+        if (self.db_path == ":memory:" or len(queries) < 2 or self.pool.max_connections < 2
+                or self._in_transaction() or self.pool.holds_connection()):
+            return [self.execute_query(query) for query in queries]
+        executor = self._executor()
+        futures = [executor.submit(self.execute_query, query) for query in queries]
+        return [future.result() for future in futures]
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        """
+        Get the query_many workers, starting them again after ``close`` or ``restore``.
         
-        sql = f"""
-            SELECT data
-            FROM documents 
-            WHERE {where_clause}
-            {limit_clause} {offset_clause}
+        One connection is left for the calling thread, since the pool raises
+        instead of waiting once all of them are in use.
         """
+        with self._query_executor_lock:
+            if self._query_executor is None:
+                self._query_executor = ThreadPoolExecutor(max_workers=self.pool.max_connections - 1,
+                                                          thread_name_prefix="zenithdb-query")
+            return self._query_executor
+    
+    def execute_query_iter(self, query: 'Query') -> Iterator[Dict[str, Any]]:
+        """Execute a query and yield its documents as they are read, without building a list."""
+        sql, params = query.compile(self)
+        return self._iter_documents(sql, params)
+    
+    def _execute_conditions(self, collection: str, conditions: List[Tuple[str, QueryOperator, Any]],
+                            limit: Optional[int] = None, skip: Optional[int] = None,
+                            sort: Tuple[Tuple[str, str], ...] = ()) -> List[Dict[str, Any]]:
+        """Execute a list of ANDed (field, operator, value) conditions against a collection."""
+        sql, params = self._conditions_sql(collection, conditions, limit, skip, sort)
+        return self._fetch_documents(sql, params, single=limit == 1)
+    
+    def _iter_conditions(self, collection: str, conditions: List[Tuple[str, QueryOperator, Any]],
+                         limit: Optional[int] = None, skip: Optional[int] = None,
+                         sort: Tuple[Tuple[str, str], ...] = ()) -> Iterator[Dict[str, Any]]:
+        """Yield the documents matching a list of ANDed conditions as they are read."""
+        sql, params = self._conditions_sql(collection, conditions, limit, skip, sort)
+        return self._iter_documents(sql, params)
+    
+    def _fetch_documents(self, sql: str, params: List[Any], single: bool = False) -> List[Dict[str, Any]]:
+        """Run a document SELECT and return the decoded documents as a list."""
+        if single:
+            with self._connection() as conn:
+                row = self._run_query(conn, sql, params).fetchone()
+                return [loads(row[0])] if row else []
+        return list(self._iter_documents(sql, params))
+    
+    def _iter_documents(self, sql: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Run a document SELECT and yield the decoded documents, decoding rows in batches.
         
-        # Check and print index usage
-        self.check_index_usage(sql, params)
+        Rows are fetched with fetchmany as plain tuples and decoded with C-level
+        map calls, so only one batch of raw rows is held at a time and callers
+        that stop early never read the rest.
+        """
+        with self._connection() as conn:
+            fetchmany = self._run_query(conn, sql, params).fetchmany
+            while True:
+                batch = fetchmany(FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                yield from map(loads, map(_first_column, batch))
+    
+    def _run_query(self, conn: sqlite3.Connection, sql: str, params: List[Any]) -> sqlite3.Cursor:
+        """Execute a SELECT; pooled connections have dirty reads enabled when they are opened."""
+        cursor = conn.cursor()
+        cursor.row_factory = None  # Plain tuples, documents are decoded from the first column
+        cursor.execute(sql, params)
+        return cursor
+    
+    def _conditions_sql(self, collection: str, conditions: List[Tuple[str, QueryOperator, Any]],
+                        limit: Optional[int], skip: Optional[int],
+                        sort: Tuple[Tuple[str, str], ...]) -> Tuple[str, List[Any]]:
+        """
+        Build the SELECT statement and parameters for a list of ANDed conditions.
         
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA read_uncommitted = ON")
-            try:
-                cursor.execute(sql, params)
-            except sqlite3.OperationalError as e:
-                if "no such index" not in str(e):
-                    raise
-                cursor.execute(sql, params)
+        The generated SQL is cached by query shape (fields and operators, but not
+        values) together with the collection and sort order, so repeated queries
+        skip SQL construction and plan analysis. Queries using REGEX bypass the
+        cache.
+        
+        Args:
+            sort: ``(field, "ASC" | "DESC")`` pairs to order the results by
+        """
+        shape = (collection, tuple(self._condition_shape(field, op, value, collection)
+                                   for field, op, value in conditions), sort)
+        cacheable = all(op != QueryOperator.REGEX for _, op, _ in conditions)
+        
+        sql = self._cached_plan(shape) if cacheable else None
+        params = self._conditions_params(collection, conditions, limit, skip)
+        
+        if sql is None:
+            # Add collection condition first for better index usage
+            where = [self._collection_filter(collection)]
+            where.extend(self._condition_sql(field, op, value, collection) for field, op, value in conditions)
+            order_by = ""
+            if sort:
+                order_by = "ORDER BY " + ", ".join(
+                    f"{json_extract_sql(field)} {direction}" for field, direction in sort
+                )
+            sql = f"""
+                SELECT data
+                FROM documents 
+                WHERE {" AND ".join(where)}
+                {order_by}
+                LIMIT ? OFFSET ?
+            """
             
-            return self._process_results(cursor, batch_size=10000)
-    
-    def _process_results(self, cursor: sqlite3.Cursor, batch_size: int = 10000) -> List[Dict[str, Any]]:
-        """Process results in efficient batches with minimal memory overhead."""
-        results = []
-        while True:
-            batch = cursor.fetchmany(batch_size)
-            if not batch:
-                break
-            # Use list comprehension for better performance
-            results.extend([json.loads(row[0]) for row in batch])
-        return results
+            # Check and print index usage when the plan is first built
+            if self.debug:
+                self.check_index_usage(sql, params)
+            
+            if cacheable:
+                self._remember_plan(shape, sql)
+        return sql, params
+    
+    def _conditions_params(self, collection: str, conditions: List[Tuple[str, QueryOperator, Any]],
+                           limit: Optional[int], skip: Optional[int]) -> List[Any]:
+        """Collect the parameters bound by the SELECT statement of ``_conditions_sql``."""
+        params: List[Any] = []
+        for field, op, value in conditions:
+            params.extend(self._condition_params(field, op, value, collection))
+        params.append(limit or self.max_result_size)
+        params.append(skip or 0)
+        return params
+    
+    def _collection_filter(self, collection: str) -> str:
+        """
+        Render the collection condition of a cached statement.
+        
+        The collection is inlined as a literal rather than bound: indexes are
+        partial on ``collection = '<name>'``, and a bound value the plan depends
+        on makes SQLite re-prepare the statement on every execution.
+        """
+        return f"collection = {sql_string(collection)}"
+    
+    def _cached_plan(self, shape: Tuple[Any, ...]) -> Optional[str]:
+        """Look up generated SQL in the plan cache, marking the shape as recently used."""
+        with self._plan_cache_lock:
+            sql = self._plan_cache.get(shape)
+            if sql is not None:
+                self._plan_cache.move_to_end(shape)
+            return sql
+    
+    def _remember_plan(self, shape: Tuple[Any, ...], sql: str) -> None:
+        """Store generated SQL in the plan cache, evicting the least recently used shape."""
+        with self._plan_cache_lock:
+            self._plan_cache[shape] = sql
+            if len(self._plan_cache) > PLAN_CACHE_SIZE:
+                self._plan_cache.popitem(last=False)
+    
+    def _condition_shape(self, field: str, op: QueryOperator, value: Any,
+                         collection: Optional[str] = None) -> Tuple[Any, ...]:
+        """Get the part of a condition that determines its SQL, ignoring literal values."""
+        if value is None:
+            return (field, None)
+        if op == QueryOperator.CONTAINS and self._text_index_for(collection, field, value):
+            return (field, op, "fts")
+        return (field, op)
+    
+    def _condition_sql(self, field: str, op: QueryOperator, value: Any, collection: Optional[str] = None) -> str:
+        """Build the SQL fragment for a single query condition."""
+        if value is None:
+            return f"""(
+                {json_extract_sql(field)} IS NULL 
+                AND json_type(data, {sql_json_path(field)}) IS NOT NULL
+            )"""
+        if op == QueryOperator.CONTAINS:
+            if field == "*":
+                return self._full_text_condition()
+            text_index = self._text_index_for(collection, field, value)
+            if text_index:
+                # The trigram index narrows the candidates, the usual check decides
+                table, column = text_index
+                return (f"(id IN (SELECT id FROM {sql_identifier(table)} WHERE {sql_identifier(column)} MATCH ?) "
+                        f"AND {self._contains_condition(field)})")
+            return self._contains_condition(field)
+        if op == QueryOperator.EQ:
+            if field == "_id":
+                return "id = ?"
+            return f"{json_extract_sql(field)} = ?"
+        if op == QueryOperator.REGEX:
+            return f"{json_extract_sql(field)} REGEXP ?"
+        if op in (QueryOperator.STARTS_WITH, QueryOperator.ENDS_WITH):
+            return f"{json_extract_sql(field)} LIKE ?"
+        if op == QueryOperator.BETWEEN:
+            return f"{json_extract_sql(field)} BETWEEN ? AND ?"
+        if op == QueryOperator.IN:
+            # The list is bound as one JSON parameter so the SQL does not depend on its length
+            return f"{json_extract_sql(field)} IN (SELECT value FROM json_each(?))"
+        return f"{json_extract_sql(field)} {_CONDITION_COMPARISONS[op]} ?"
+    
+    def _condition_params(self, field: str, op: QueryOperator, value: Any,
+                          collection: Optional[str] = None) -> List[Any]:
+        """Get the parameters bound by the SQL fragment of a single query condition."""
+        if value is None:
+            return []
+        if op == QueryOperator.CONTAINS:
+            if field == "*":
+                return [value, value]
+            if self._text_index_for(collection, field, value):
+                return [f'"{value}"', value, f"%{value}%"]
+            return [value, f"%{value}%"]
+        if op == QueryOperator.STARTS_WITH:
+            return [f"{value}%"]
+        if op == QueryOperator.ENDS_WITH:
+            return [f"%{value}"]
+        if op == QueryOperator.IN:
+            return [dumps(list(value))]
+        if op == QueryOperator.BETWEEN:
+            return list(value)  # BETWEEN value should be a list of [start, end]
+        return [value]
+    
+    def _text_index_for(self, collection: Optional[str], field: str, value: Any) -> Optional[Tuple[str, str]]:
+        """
+        Find the trigram index (table, column) that can prefilter ``$contains`` on a field.
+        
+        Trigrams only match terms of three or more characters. Terms with quotes,
+        backslashes or control characters are left to the plain check, since array
+        fields are indexed as JSON text in which those are escaped.
+        """
+        if (collection is None or not isinstance(value, str) or len(value) < 3
+                or '"' in value or '\\' in value or not value.isprintable()):
+            return None
+        for index in self.list_indexes(collection):
+            if index['type'] == 'fts' and field in index['fields']:
+                return index['name'], field.replace('.', '_')
+        return None
+    
+    def _contains_condition(self, field: str) -> str:
+        """
+        Build a CONTAINS condition for a field.
+        
+        Array fields are matched element-wise through json_each so that only exact
+        members match; scalar fields fall back to a substring match. Binds the
+        value and a LIKE pattern for it.
+        """
+        path = sql_json_path(field)
+        return f"""(CASE json_type(data, {path})
+            WHEN 'array' THEN EXISTS (SELECT 1 FROM json_each(data, {path}) WHERE value = ?)
+            ELSE json_extract(data, {path}) LIKE ?
+        END)"""
+    
+    def _full_text_condition(self) -> str:
+        """
+        Build the condition for a full-text search over all values of a document.
+        
+        The raw JSON text is checked first as a cheap filter, then json_tree confirms
+        the term occurs in a value rather than a key, matching booleans by their
+        JSON names. Binds the lowercased term twice; it must be printable ASCII
+        without quotes or backslashes, which JSON stores verbatim.
+        """
+        return """(instr(lower(data), ?) > 0 AND EXISTS (
+            SELECT 1 FROM json_tree(data)
+            WHERE type NOT IN ('object', 'array', 'null')
+            AND instr(CASE type WHEN 'true' THEN 'true' WHEN 'false' THEN 'false' ELSE lower(atom) END, ?) > 0
+        ))"""
     
     def _get_index_hint(self, collection: str, conditions: List[Tuple[str, QueryOperator, Any]]) -> str:
         """Get the best index hint for the query based on available indexes."""
@@ -530,7 +992,7 @@ class Database:
         
         # First try to find a perfect match for compound indexes
         for index in indexes:
-            index_fields = json.loads(index['fields']) if isinstance(index['fields'], str) else index['fields']
+            index_fields = loads(index['fields']) if isinstance(index['fields'], str) else index['fields']
             if not isinstance(index_fields, list):
                 index_fields = [index_fields]
             
@@ -540,7 +1002,7 @@ class Database:
         
         # If no perfect match, try to find an index that can help
         for index in indexes:
-            index_fields = json.loads(index['fields']) if isinstance(index['fields'], str) else index['fields']
+            index_fields = loads(index['fields']) if isinstance(index['fields'], str) else index['fields']
             if not isinstance(index_fields, list):
                 index_fields = [index_fields]
             
@@ -557,131 +1019,177 @@ class Database:
         return ""
     
     def update(self, collection: str, query: Dict[str, Any], update: Dict[str, Any]) -> int:
-        """Update documents matching query."""
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Build WHERE clause
-            where_conditions = []
-            params = []
-            for field, value in query.items():
-                if field == "_id":
-                    where_conditions.append("id = ?")
-                    params.append(value)
-                elif isinstance(value, dict):
-                    for op, val in value.items():
-                        op = op.lstrip("$")
-                        if op in ("gt", "lt", "gte", "lte", "ne"):
-                            op_map = {"gt": ">", "lt": "<", "gte": ">=", "lte": "<=", "ne": "!="}
-                            where_conditions.append(f"json_extract(data, '$.{field}') {op_map[op]} ?")
-                            params.append(json.dumps(val) if isinstance(val, str) else val)
-                        elif op == "in":
-                            placeholders = ','.join(['?' for _ in val])
-                            where_conditions.append(f"json_extract(data, '$.{field}') IN ({placeholders})")
-                            params.extend([json.dumps(v) if isinstance(v, str) else v for v in val])
-                        elif op == "contains":
-                            where_conditions.append(f"json_extract(data, '$.{field}') LIKE ?")
-                            params.append(f'%{json.dumps(val)[1:-1]}%')
-                else:
-                    if '.' in field:
-                        # Handle nested fields
-                        where_conditions.append(f"json_extract(data, '$.{field}') = ?")
-                        params.append(json.dumps(value) if isinstance(value, str) else value)
-                    else:
-                        # Handle regular fields
-                        where_conditions.append(f"json_extract(data, '$.{field}') = ?")
-                        params.append(json.dumps(value) if isinstance(value, str) else value)
-            
-            # Add collection condition
-            where_conditions.append("collection = ?")
-            params.append(collection)
-            
-            # Get matching documents
-            cursor.execute(
-                f"SELECT id, data FROM documents WHERE {' AND '.join(where_conditions)}",
-                params
-            )
-            
-            # Update documents
-            updated = 0
-            for doc_id, doc_data in cursor:
-                doc = json.loads(doc_data)
-                if "$set" in update:
-                    for field, value in update["$set"].items():
-                        parts = field.split('.')
-                        current = doc
-                        for part in parts[:-1]:
-                            if part not in current:
-                                current[part] = {}
-                            current = current[part]
-                        
-                        # Handle array index updates
-                        last_part = parts[-1]
-                        if current and isinstance(current, list) and last_part.isdigit():
-                            current[int(last_part)] = value
+        """
+        Update documents matching query.
+        
+        The UPDATE statement is cached by the shape of the query and the update
+        document, so repeated updates only collect their parameters.
+        """
+        where_shape, where_params = self._where_shape(query, collection)
+        update_shape, update_params = self._update_shape(update)
+        shape = ("update", collection, where_shape, update_shape)
+        sql = self._cached_plan(shape)
+        if sql is None:
+            sql = (f"UPDATE documents SET data = {self._update_expression(update_shape)}, "
+                   f"updated_at = CURRENT_TIMESTAMP WHERE {self._where_sql(collection, where_shape)}")
+            self._remember_plan(shape, sql)
+        
+        in_transaction = self._in_transaction()
+        with self._writer() as conn:
+            try:
+                updated = conn.execute(sql, update_params + where_params).rowcount
+                if not in_transaction:
+                    conn.commit()
+                return updated
+            except Exception as e:
+                if not in_transaction:
+                    conn.rollback()
+                raise e
+    
+    def _update_shape(self, update: Dict[str, Any]) -> Tuple[Tuple[Any, ...], List[Any]]:
+        """Split an update document into its operators and fields, and the values it binds."""
+        shape = []
+        params = []
+        for op, fields in update.items():
+            if op == "$set":
+                # Strings, numbers and None are bound as they are, other values serialized
+                raw = tuple(type(value) in _JSON_SCALARS for value in fields.values())
+                shape.append((op, tuple(fields), raw))
+                params.extend(value if is_raw else dumps(value)
+                              for value, is_raw in zip(fields.values(), raw))
+            elif op == "$inc":
+                shape.append((op, tuple(fields)))
+                params.extend(fields.values())
+            elif op == "$unset":
+                shape.append((op, tuple(fields)))
+            elif not op.startswith("$"):
+                is_raw = type(fields) in _JSON_SCALARS
+                shape.append((op, None, is_raw))
+                params.append(fields if is_raw else dumps(fields))
+            else:
+                raise ValueError(f"Unsupported update operator: {op}")
+        return tuple(shape), params
+    
+    def _update_expression(self, shape: Tuple[Tuple[Any, ...], ...]) -> str:
+        """
+        Translate an update shape into a SQL expression over the data column.
+        
+        ``$set`` and ``$inc`` become a single ``json_set`` call and ``$unset`` a
+        ``json_remove``, so documents are modified in place by SQLite without being
+        decoded and re-encoded in Python. Strings, numbers and None are bound
+        directly, which json_set stores as the matching JSON value; only lists,
+        dicts and booleans go through ``json(?)``. Keys without an operator are
+        set as top-level fields.
+        """
+        assignments = []
+        removals = []
+        for op, fields, *raw in shape:
+            if op == "$set":
+                assignments.extend(f"{json_update_path_sql(field)}, {'?' if is_raw else 'json(?)'}"
+                                   for field, is_raw in zip(fields, raw[0]))
+            elif op == "$inc":
+                for field in fields:
+                    path = json_update_path_sql(field)
+                    assignments.append(f"{path}, coalesce(json_extract(data, {path}), 0) + ?")
+            elif op == "$unset":
+                removals.extend(json_update_path_sql(field) for field in fields)
+            else:
+                assignments.append(f"{json_update_path_sql(op)}, {'?' if raw[0] else 'json(?)'}")
+        
+        expression = "data"
+        if assignments:
+            expression = f"json_set({expression}, {', '.join(assignments)})"
+        if removals:
+            expression = f"json_remove({expression}, {', '.join(removals)})"
+        return expression
+    
+    def _where_shape(self, query: Dict[str, Any], collection: Optional[str] = None) -> Tuple[Tuple[Any, ...], List[Any]]:
+        """
+        Split a dict query for update and delete into its shape and the values it binds.
+        
+        The shape holds the fields and operators, everything ``_where_sql`` needs
+        to build the WHERE clause. Scalars are bound as they are, since
+        ``json_extract`` returns JSON strings as SQL text without quotes.
+        ``$contains`` binds what ``_contains_condition`` needs, as in ``find``; terms
+        a trigram index can serve also carry its table and column.
+        """
+        shape = []
+        params = []
+        for field, value in query.items():
+            if field == "_id":
+                shape.append((field, None))
+                params.append(value)
+            elif isinstance(value, dict):
+                for key, val in value.items():
+                    op = key.lstrip("$")
+                    if op == "eq":
+                        shape.append((field, None))
+                        params.append(val if isinstance(val, _JSON_SCALARS) else dumps(val))
+                    elif op in _WHERE_COMPARISONS:
+                        shape.append((field, op))
+                        params.append(val if isinstance(val, _JSON_SCALARS) else dumps(val))
+                    elif op == "in":
+                        shape.append((field, op))
+                        params.append(dumps(list(val)))
+                    elif op == "contains":
+                        text_index = self._text_index_for(collection, field, val)
+                        if text_index:
+                            shape.append((field, op) + text_index)
+                            params.append(f'"{val}"')
                         else:
-                            current[last_part] = value
-                else:
-                    doc.update(update)
-                
-                cursor.execute(
-                    "UPDATE documents SET data = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (json.dumps(doc), doc_id)
-                )
-                updated += cursor.rowcount
-            
-            conn.commit()
-            return updated
+                            shape.append((field, op))
+                        params.extend(self._condition_params(field, QueryOperator.CONTAINS, val))
+                    else:
+                        # Dropping the condition would match every document of the collection
+                        raise ValueError(f"Unsupported query operator for update and delete: {key}")
+            else:
+                shape.append((field, None))
+                params.append(value if isinstance(value, _JSON_SCALARS) else dumps(value))
+        return tuple(shape), params
+    
+    def _where_sql(self, collection: str, shape: Tuple[Tuple[Any, ...], ...]) -> str:
+        """Build the WHERE clause for a shape from ``_where_shape``, ending with the collection."""
+        where_conditions = []
+        for field, op, *text_index in shape:
+            if field == "_id" and op is None:
+                where_conditions.append("id = ?")
+            elif op is None:
+                where_conditions.append(f"{json_extract_sql(field)} = ?")
+            elif op == "in":
+                # One JSON parameter keeps the statement independent of the list length
+                where_conditions.append(f"{json_extract_sql(field)} IN (SELECT value FROM json_each(?))")
+            elif op == "contains":
+                if text_index:
+                    # The trigram index narrows the candidates, the usual check decides
+                    table, column = text_index
+                    where_conditions.append(
+                        f"id IN (SELECT id FROM {sql_identifier(table)} WHERE {sql_identifier(column)} MATCH ?)")
+                where_conditions.append(self._contains_condition(field))
+            else:
+                where_conditions.append(f"{json_extract_sql(field)} {_WHERE_COMPARISONS[op]} ?")
+        where_conditions.append(self._collection_filter(collection))
+        return " AND ".join(where_conditions)
     
     def delete(self, collection: str, query: Dict[str, Any]) -> int:
         """Delete documents matching query."""
-        with self.pool.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Build WHERE clause
-            where_conditions = []
-            params = []
-            for field, value in query.items():
-                if field == "_id":
-                    where_conditions.append("id = ?")
-                    params.append(value)
-                elif isinstance(value, dict):
-                    for op, val in value.items():
-                        op = op.lstrip("$")
-                        if op in ("gt", "lt", "gte", "lte", "ne"):
-                            op_map = {"gt": ">", "lt": "<", "gte": ">=", "lte": "<=", "ne": "!="}
-                            where_conditions.append(f"json_extract(data, '$.{field}') {op_map[op]} ?")
-                            params.append(json.dumps(val) if isinstance(val, str) else val)
-                        elif op == "in":
-                            placeholders = ','.join(['?' for _ in val])
-                            where_conditions.append(f"json_extract(data, '$.{field}') IN ({placeholders})")
-                            params.extend([json.dumps(v) if isinstance(v, str) else v for v in val])
-                        elif op == "contains":
-                            where_conditions.append(f"json_extract(data, '$.{field}') LIKE ?")
-                            params.append(f'%{json.dumps(val)[1:-1]}%')
-                else:
-                    if '.' in field:
-                        # Handle nested fields
-                        where_conditions.append(f"json_extract(data, '$.{field}') = ?")
-                        params.append(json.dumps(value) if isinstance(value, str) else value)
-                    else:
-                        # Handle regular fields
-                        where_conditions.append(f"json_extract(data, '$.{field}') = ?")
-                        params.append(json.dumps(value) if isinstance(value, str) else value)
-            
-            # Add collection condition
-            where_conditions.append("collection = ?")
-            params.append(collection)
-            
-            # Execute delete
-            cursor.execute(
-                f"DELETE FROM documents WHERE {' AND '.join(where_conditions)}",
-                params
-            )
-            
-            deleted = cursor.rowcount
-            conn.commit()
-            return deleted
+        where_shape, params = self._where_shape(query, collection)
+        shape = ("delete", collection, where_shape)
+        sql = self._cached_plan(shape)
+        if sql is None:
+            sql = f"DELETE FROM documents WHERE {self._where_sql(collection, where_shape)}"
+            self._remember_plan(shape, sql)
+        
+        in_transaction = self._in_transaction()
+        with self._writer() as conn:
+            try:
+                deleted = conn.execute(sql, params).rowcount
+                if not in_transaction:
+                    conn.commit()
+                return deleted
+            except Exception as e:
+                if not in_transaction:
+                    conn.rollback()
+                raise e
     
     def _check_connection_health(self, conn: sqlite3.Connection) -> bool:
         """Check if connection is healthy."""
@@ -721,33 +1229,52 @@ class Database:
         Returns:
             True if restore was successful, False otherwise
         """
-        # Close all connections first
-        self.close()
-        
+        # Writers wait for the restore instead of writing to the file being replaced
+        write_lock = self.pool.write_lock
+        if not write_lock.acquire(timeout=self.pool.connection_timeout):
+            raise sqlite3.OperationalError("database is locked")
         try:
-            # Open backup file
-            backup_conn = sqlite3.connect(backup_path)
-            # Open destination database
-            dest_conn = sqlite3.connect(self.db_path)
-            # Perform restore
-            backup_conn.backup(dest_conn)
-            # Clean up
-            backup_conn.close()
-            dest_conn.close()
+            # Close all connections first
+            self.close()
             
-            # Reinitialize connection pool
-            self.pool = ConnectionPool(self.db_path, self.pool.max_connections)
-            return True
-        except (sqlite3.Error, IOError) as e:
-            # Attempt to reinitialize connection pool in case of failure
             try:
-                self.pool = ConnectionPool(self.db_path, self.pool.max_connections)
-            except:
-                pass
-            raise RuntimeError(f"Failed to restore from backup: {e}")
+                # Open backup file
+                backup_conn = sqlite3.connect(backup_path)
+                # Open destination database
+                dest_conn = sqlite3.connect(self.db_path)
+                # Perform restore
+                backup_conn.backup(dest_conn)
+                self._invalidate_index_cache()
+                # Clean up
+                backup_conn.close()
+                dest_conn.close()
+                
+                # Reinitialize connection pool
+                self._reopen_pool()
+                return True
+            except (sqlite3.Error, IOError) as e:
+                # Attempt to reinitialize connection pool in case of failure
+                try:
+                    self._reopen_pool()
+                except:
+                    pass
+                raise RuntimeError(f"Failed to restore from backup: {e}")
+        finally:
+            write_lock.release()
+    
+    def _reopen_pool(self) -> None:
+        """Replace the closed pool with one of the same settings that shares its write lock."""
+        pool = ConnectionPool(self.db_path, self.pool.max_connections, self.pool.cache_mb, self.pool.mmap_mb,
+                              statement_cache_size=PLAN_CACHE_SIZE)
+        pool.write_lock = self.pool.write_lock
+        self.pool = pool
     
     def close(self):
         """Close all database connections."""
+        with self._query_executor_lock:
+            if self._query_executor is not None:
+                self._query_executor.shutdown(wait=True)
+                self._query_executor = None
         # Close connections in the same thread they were created
         with self.pool.get_connection() as conn:
             conn.close()
@@ -0,0 +1,166 @@
+"""
+Compiled Python matchers for dict queries.
+
+Predicates SQLite cannot evaluate (regular expressions and ``*`` full-text
+search) are checked in Python after the rest of the query has been pushed down.
+Each query shape is compiled once into a straight-line function; literal values
+are passed in as parameters so queries with the same shape share the function.
+"""
+import functools
+import re
+import sys
+from typing import Any, Callable, Dict, List, Tuple
+
+_MISSING = object()
+
+_COMPARISONS = {"eq": "==", "ne": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Expression templates per operator, ``v`` is the field value and ``{p}`` its parameter
+_TEMPLATES = {
+    "in": "v in {p}",
+    "between": "v is not _MISSING and {p}[0] <= v <= {p}[1]",
+    "contains": "({p} in v if isinstance(v, list) else isinstance(v, str) and str({p}).lower() in v.lower())",
+    "regex": "isinstance(v, str) and _re_search({p}, v) is not None",
+    "startsWith": "isinstance(v, str) and v.startswith({p})",
+    "endsWith": "isinstance(v, str) and v.endswith({p})",
+}
+
+# Relative evaluation cost per operator; cheap, selective checks run first
+_COSTS = {
+    "eq": 2, "ne": 2,
+    "gt": 3, "gte": 3, "lt": 3, "lte": 3, "between": 3,
+    "in": 4,
+    "startsWith": 5, "endsWith": 5,
+    "contains": 10,
+    "regex": 50,
+}
+_FULL_TEXT_COST = 100
+
+def _get_path(doc: Dict[str, Any], parts: Tuple[str, ...]) -> Any:
+    """Get a nested value by path parts, or _MISSING if the path does not exist."""
+    value = doc
+    for part in parts:
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+            if value is _MISSING:
+                return _MISSING
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+def search_value(value: Any, term: str) -> bool:
+    """
+    Search through any value type for a lowercased search term.
+    
+    Nested values are walked with an explicit stack rather than recursion, which
+    avoids a function call and generator per container.
+    """
+    stack = [value]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        value = pop()
+        if isinstance(value, str):
+            if term in value.lower():
+                return True
+        elif isinstance(value, dict):
+            extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+        elif isinstance(value, (int, float)):
+            if term in str(value).lower():
+                return True
+    return False
+
+def _split_query(query: Dict[str, Any]) -> Tuple[Tuple[Any, ...], List[Any]]:
+    """Split a dict query into its shape and the literal values it binds."""
+    shape = []
+    params = []
+    for field, value in query.items():
+        if isinstance(value, dict):
+            ops = tuple(op.lstrip("$") for op in value)
+            shape.append((field, ops))
+            for op, val in value.items():
+                params.append(str(val).lower() if field == "*" else val)
+        else:
+            shape.append((field, None))
+            params.append(value)
+    return tuple(shape), params
+
+@functools.lru_cache(maxsize=256)
+def _compile_shape(shape: Tuple[Any, ...]) -> Callable[[Dict[str, Any], List[Any]], bool]:
+    """
+    Generate and compile the matcher function for a query shape.
+
+    Predicates are all ANDed and free of side effects, so they are reordered by
+    estimated cost: equality checks run first and full-text search last.
+    """
+    # Assign each parameter its index before reordering the predicates
+    predicates = []
+    index = 0
+    for field, ops in shape:
+        checks = []
+        for op in ops or (None,):
+            checks.append((_FULL_TEXT_COST if field == "*" else _COSTS.get(op, 2), op, f"p[{index}]"))
+            index += 1
+        checks.sort(key=lambda check: check[0])
+        predicates.append((checks[0][0], field, ops, checks))
+    predicates.sort(key=lambda predicate: predicate[0])
+
+    lines = ["def _m(d, p):", "    try:"]
+    for _, field, ops, checks in predicates:
+        if field == "*":
+            for _, op, param in checks:
+                if op != "contains":
+                    raise ValueError(f"Unsupported operator for full-text search: ${op}")
+                lines.append(f"        if not _search_value(d, {param}):")
+                lines.append("            return False")
+            continue
+
+        # Dotted paths are resolved with an inlined chain of dict lookups
+        parts = [sys.intern(part) for part in field.split('.')]
+        lines.append(f"        v = d.get({parts[0]!r}, _MISSING)")
+        for part in parts[1:]:
+            lines.append(f"        v = v.get({part!r}, _MISSING) if type(v) is dict else _get_path(v, ({part!r},))")
+
+        for _, op, param in checks:
+            if op is None:
+                check = f"v is None if {param} is None else v == {param}"
+            elif op in ("eq", "ne"):
+                check = f"v is not _MISSING and v {_COMPARISONS[op]} {param}"
+            elif op in _COMPARISONS:
+                check = f"v is not None and v is not _MISSING and v {_COMPARISONS[op]} {param}"
+            elif op in _TEMPLATES:
+                check = _TEMPLATES[op].format(p=param)
+            else:
+                raise ValueError(f"Unsupported query operator: ${op}")
+            lines.append(f"        if not ({check}):")
+            lines.append("            return False")
+    lines.append("        return True")
+    lines.append("    except TypeError:")
+    lines.append("        return False")
+
+    namespace = {
+        "_MISSING": _MISSING,
+        "_get_path": _get_path,
+        "_re_search": re.search,
+        "_search_value": search_value,
+    }
+    exec(compile("\n".join(lines), "<matcher>", "exec"), namespace)
+    return namespace["_m"]
+
+def compile_matcher(query: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a dict query into a function that tests a single document.
+
+    Args:
+        query: Dict query, e.g. ``{"email": {"$regex": "@example\\.com$"}}``
+
+    Returns:
+        Function returning True for matching documents
+    """
+    shape, params = _split_query(query)
+    matcher = _compile_shape(shape)
+    return lambda doc: matcher(doc, params)
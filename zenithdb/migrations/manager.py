@@ -35,7 +35,7 @@ class MigrationManager:
     
     def _init_migrations_table(self):
         """Initialize the migrations tracking table."""
-        with self.pool.get_connection() as conn:
+        with self.pool.writer() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS migrations (
                     version TEXT PRIMARY KEY,
@@ -83,7 +83,7 @@ class MigrationManager:
             if target_version and migration.version > target_version:
                 break
                 
-            with self.pool.get_connection() as conn:
+            with self.pool.writer() as conn:
                 try:
                     migration.up(conn)
                     conn.execute(
@@ -108,7 +108,7 @@ class MigrationManager:
             if migration.version > current or migration.version <= target_version:
                 continue
                 
-            with self.pool.get_connection() as conn:
+            with self.pool.writer() as conn:
                 try:
                     migration.down(conn)
                     conn.execute(
@@ -122,7 +122,7 @@ class MigrationManager:
     
     def init_migrations_table(self):
         """Public method to initialize migrations table."""
-        with self.pool.get_connection() as conn:
+        with self.pool.writer() as conn:
             conn.execute('DELETE FROM migrations')  # Clear existing migrations
             conn.commit()
         self._init_migrations_table()
@@ -183,7 +183,7 @@ class MigrationManager:
         if not isinstance(migration_data, dict) or 'version' not in migration_data:
             raise ValueError("Invalid migration data")
             
-        with self.pool.get_connection() as conn:
+        with self.pool.writer() as conn:
             # Find the migration to rollback
             cursor = conn.execute('SELECT version FROM migrations WHERE version = ?', 
                                 (migration_data['version'],))
@@ -1,10 +1,22 @@
 import sqlite3
-import json
-import uuid
+import functools
+from itertools import chain, islice
 from typing import List, Dict, Any, Optional, Callable
 from contextlib import contextmanager
+from .utils.ids import new_ids
+from .utils.paths import sql_identifier
+from .utils.serialization import dumps
 
 BATCH_SIZE = 1000
+# Inserts larger than this rebuild non-unique indexes once instead of updating them per row
+DEFER_INDEX_THRESHOLD = 10000
+# Rows bound per multi-row INSERT, three parameters each within SQLite's 999 variable limit
+ROWS_PER_INSERT = 999 // 3
+
+@functools.lru_cache(maxsize=16)
+def _insert_sql(rows: int) -> str:
+    """INSERT statement binding ``rows`` documents in one multi-row VALUES clause."""
+    return "INSERT INTO documents (id, collection, data) VALUES " + ",".join(["(?, ?, ?)"] * rows)
 
 class BulkOperations:
     """Bulk operations handler for SQLite."""
@@ -73,68 +85,124 @@ class BulkOperations:
         else:
             self.__exit__(None, None, None)
     
+    def _drop_deferrable_indexes(self, collection: str) -> List[str]:
+        """Drop the non-unique indexes of a collection and return their SQL for recreation."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT m.name, m.sql FROM sqlite_master m
+                JOIN indexes i ON i.name = m.name
+                WHERE m.type = 'index' AND i.collection = ? AND i.unique_index = 0
+            """, [collection])
+        except sqlite3.OperationalError:
+            return []  # No index registry on this connection
+        deferred = cursor.fetchall()
+        for name, _ in deferred:
+            cursor.execute(f"DROP INDEX IF EXISTS {sql_identifier(name)}")
+        return [sql for _, sql in deferred]
+    
     def bulk_insert(self, collection: str, documents: List[Dict[str, Any]], 
-                   doc_ids: Optional[List[str]] = None) -> List[str]:
-        """Insert multiple documents in a single transaction."""
+                   doc_ids: Optional[List[str]] = None,
+                   validator: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[str]:
+        """
+        Insert multiple documents in a single transaction.
+        
+        Documents are validated first; id assignment and serialization then happen
+        in a single pass, and rows are written with multi-row VALUES statements of
+        up to ROWS_PER_INSERT documents. For inserts above DEFER_INDEX_THRESHOLD
+        documents, the collection's non-unique indexes are dropped and rebuilt afterwards in one
+        sorted pass, which is cheaper than maintaining them row by row. A transaction
+        is opened first if none is active, so a failed insert also restores them.
+        
+        Args:
+            collection: Collection name
+            documents: Documents to insert, each gets its ``_id`` set
+            doc_ids: Explicit ids for the documents (optional)
+            validator: Raise ValueError for documents it rejects (optional)
+        """
         if not documents:
             return []
         
         # Calculate optimal batch size based on document characteristics
         batch_size = self._calculate_optimal_batch_size(documents)
         
-        if doc_ids is None:
-            doc_ids = [str(uuid.uuid4()) for _ in documents]
-        elif len(doc_ids) != len(documents):
+        if doc_ids is not None and len(doc_ids) != len(documents):
             raise ValueError("Length of doc_ids must match length of documents")
         
+        inserted_ids = list(doc_ids) if doc_ids is not None else new_ids(len(documents))
+        
+        # Every document is validated before any of them gets its _id, so a
+        # rejected batch leaves the caller's dicts as they were
+        if validator is not None:
+            for doc in documents:
+                if not validator(doc):
+                    raise ValueError("Document failed validation")
+        
+        def rows():
+            for doc, doc_id in zip(documents, inserted_ids):
+                doc['_id'] = doc_id
+                yield (doc_id, collection, dumps(doc))
+        
         cursor = self.connection.cursor()
         try:
-            # Add _id to each document
-            for doc, doc_id in zip(documents, doc_ids):
-                doc['_id'] = doc_id
-            
-            # Prepare documents for insertion
-            values = [(doc_id, collection, json.dumps(doc)) 
-                     for doc_id, doc in zip(doc_ids, documents)]
-            
-            # Insert in batches
             total = len(documents)
-            for i in range(0, len(values), batch_size):
-                batch = values[i:i + batch_size]
-                cursor.executemany(
-                    "INSERT INTO documents (id, collection, data) VALUES (?, ?, ?)",
-                    batch
-                )
+            deferred_indexes = []
+            if total > DEFER_INDEX_THRESHOLD:
+                # DDL outside a transaction commits at once, so a failed insert would
+                # leave the indexes dropped; open one for the rollback to restore them
+                if not self.connection.in_transaction:
+                    self.connection.execute("BEGIN")
+                deferred_indexes = self._drop_deferrable_indexes(collection)
+            
+            # Rows are flattened straight into the parameters of multi-row VALUES
+            # statements, so no batch of row tuples is held between the two
+            values = chain.from_iterable(rows())
+            params_per_insert = 3 * ROWS_PER_INSERT
+            for i in range(0, total, batch_size):
+                full, rest = divmod(min(batch_size, total - i), ROWS_PER_INSERT)
+                if full:
+                    cursor.executemany(_insert_sql(ROWS_PER_INSERT), (
+                        tuple(islice(values, params_per_insert)) for _ in range(full)
+                    ))
+                if rest:
+                    cursor.execute(_insert_sql(rest), tuple(islice(values, 3 * rest)))
                 if self.progress_callback:
                     self.progress_callback(min(i + batch_size, total), total)
             
-            return doc_ids
+            for index_sql in deferred_indexes:
+                cursor.execute(index_sql)
+            
+            return inserted_ids
         except Exception as e:
             if not self._transaction_active:
                 self.connection.rollback()
             raise e
     
     def bulk_update(self, collection: str, updates: List[Dict[str, Any]]):
-        """Update multiple documents in a single transaction."""
+        """
+        Update multiple documents in a single transaction.
+        
+        Each update is merged into its document with json_patch. All rows are
+        bound to one prepared statement through a single executemany call;
+        updates without an ``_id`` are skipped.
+        """
         if not updates:
             return
         
-        batch_size = self._calculate_optimal_batch_size(updates)
-        cursor = self.connection.cursor()
+        def rows():
+            for update in updates:
+                doc_id = update.pop('_id', None)
+                if doc_id:
+                    yield (dumps(update), doc_id, collection)
+        
         try:
-            # Process updates in batches
-            for i in range(0, len(updates), batch_size):
-                batch = updates[i:i + batch_size]
-                for update in batch:
-                    doc_id = update.pop('_id', None)
-                    if doc_id:
-                        cursor.execute(
-                            """UPDATE documents 
-                               SET data = json_patch(data, ?),
-                                   updated_at = CURRENT_TIMESTAMP 
-                               WHERE id = ? AND collection = ?""",
-                            (json.dumps(update), doc_id, collection)
-                        )
+            self.connection.executemany(
+                """UPDATE documents 
+                   SET data = json_patch(data, ?),
+                       updated_at = CURRENT_TIMESTAMP 
+                   WHERE id = ? AND collection = ?""",
+                rows()
+            )
             
             if not self._transaction_active:
                 self.connection.commit()
@@ -148,22 +216,17 @@ class BulkOperations:
         if not doc_ids:
             return
         
-        # For deletes, use a simpler calculation since we're just dealing with IDs
-        batch_size = min(BATCH_SIZE, max(100, len(doc_ids) // 10))
         cursor = self.connection.cursor()
         try:
-            # Delete in batches
-            for i in range(0, len(doc_ids), batch_size):
-                batch = doc_ids[i:i + batch_size]
-                placeholders = ','.join(['?' for _ in batch])
-                cursor.execute(
-                    f"DELETE FROM documents WHERE id IN ({placeholders}) AND collection = ?",
-                    batch + [collection]
-                )
+            # One JSON parameter keeps a single statement for any number of ids
+            cursor.execute(
+                "DELETE FROM documents WHERE id IN (SELECT value FROM json_each(?)) AND collection = ?",
+                [dumps(list(doc_ids)), collection]
+            )
             
             if not self._transaction_active:
                 self.connection.commit()
         except Exception as e:
             if not self._transaction_active:
                 self.connection.rollback()
-            raise e
\ No newline at end of file
+            raise e
@@ -16,6 +16,19 @@ class QueryOperator(str, Enum):
     STARTS_WITH = "STARTS_WITH"
     ENDS_WITH = "ENDS_WITH"
 
+# Dict query keys for the operators without a dedicated branch in Query.to_dict
+_DICT_OPERATOR_KEYS = {
+    QueryOperator.GT: "$gt",
+    QueryOperator.GTE: "$gte",
+    QueryOperator.LT: "$lt",
+    QueryOperator.LTE: "$lte",
+    QueryOperator.NE: "$ne",
+    QueryOperator.BETWEEN: "$between",
+    QueryOperator.REGEX: "$regex",
+    QueryOperator.STARTS_WITH: "$startsWith",
+    QueryOperator.ENDS_WITH: "$endsWith"
+}
+
 class QueryField:
     """Represents a field in a query with operator overloading."""
     
@@ -94,6 +107,7 @@ class Query:
         self.limit_value: Optional[int] = None
         self.skip_value: Optional[int] = None
         self._query_cache = {}
+        self._compiled: Optional[Tuple[Any, str]] = None
     
     def __getattr__(self, name: str) -> 'QueryField':
         """Support for field access."""
@@ -158,6 +172,31 @@ class Query:
         self._query_cache[cache_key] = result
         return result
     
+    def compile(self, database=None) -> Tuple[str, List[Any]]:
+        """
+        Render the query as SQL and the parameters to bind.
+        
+        The SQL text is kept on the query for its current shape (fields,
+        operators and sort order) and the database's indexes, so running it again with new values, limits
+        or offsets only collects the parameters.
+        """
+        database = database or self.database
+        if not self.collection or database is None:
+            raise ValueError("Query must have collection and database set")
+        
+        key = (database, database._index_cache_version, self.collection,
+               tuple(database._condition_shape(field, op, value, self.collection)
+                     for field, op, value in self.conditions),
+               tuple(self.sort_fields))
+        if self._compiled is not None and self._compiled[0] == key:
+            return self._compiled[1], database._conditions_params(self.collection, self.conditions,
+                                                                  self.limit_value, self.skip_value)
+        
+        sql, params = database._conditions_sql(self.collection, self.conditions, self.limit_value,
+                                               self.skip_value, tuple(self.sort_fields))
+        self._compiled = (key, sql)
+        return sql, params
+    
     def _generate_cache_key(self) -> str:
         """Generate a unique cache key for the query."""
         return hash(str(self.to_dict()))
@@ -179,18 +218,7 @@ class Query:
                     result[field] = {}
                 result[field]["$in"] = value
             else:
-                op_map = {
-                    QueryOperator.GT: "$gt",
-                    QueryOperator.GTE: "$gte",
-                    QueryOperator.LT: "$lt",
-                    QueryOperator.LTE: "$lte",
-                    QueryOperator.NE: "$ne",
-                    QueryOperator.BETWEEN: "$between",
-                    QueryOperator.REGEX: "$regex",
-                    QueryOperator.STARTS_WITH: "$startsWith",
-                    QueryOperator.ENDS_WITH: "$endsWith"
-                }
                 if field not in result:
                     result[field] = {}
-                result[field][op_map[op]] = value
+                result[field][_DICT_OPERATOR_KEYS[op]] = value
         return result
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Document id generation.
+
+Ids are ULIDs: a 48-bit millisecond timestamp followed by 80 random bits,
+encoded as 26 Crockford base32 characters. They sort by creation time, so new
+rows are appended to the right edge of the primary key B-tree instead of being
+scattered across it like uuid4 values.
+"""
+import os
+import time
+from typing import List
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Every pair of characters, indexed by the 10 bits they encode
+_PAIRS = [high + low for high in _CROCKFORD for low in _CROCKFORD]
+
+def _timestamp() -> str:
+    """Encode the current millisecond timestamp as the 10 leading id characters."""
+    ms = time.time_ns() // 1_000_000
+    return (_PAIRS[ms >> 40] + _PAIRS[ms >> 30 & 1023] + _PAIRS[ms >> 20 & 1023]
+            + _PAIRS[ms >> 10 & 1023] + _PAIRS[ms & 1023])
+
+def _random(value: int) -> str:
+    """Encode 80 random bits as the 16 trailing id characters."""
+    return (_PAIRS[value >> 70] + _PAIRS[value >> 60 & 1023] + _PAIRS[value >> 50 & 1023]
+            + _PAIRS[value >> 40 & 1023] + _PAIRS[value >> 30 & 1023] + _PAIRS[value >> 20 & 1023]
+            + _PAIRS[value >> 10 & 1023] + _PAIRS[value & 1023])
+
+def new_id() -> str:
+    """Generate a new time-ordered document id."""
+    return _timestamp() + _random(int.from_bytes(os.urandom(10), "big"))
+
+def new_ids(count: int) -> List[str]:
+    """
+    Generate ``count`` time-ordered document ids at once.
+    
+    The random bits of all ids come from a single ``os.urandom`` call, and the
+    batch shares one timestamp.
+    """
+    prefix = _timestamp()
+    raw = os.urandom(10 * count)
+    from_bytes = int.from_bytes
+    return [prefix + _random(from_bytes(raw[i:i + 10], "big")) for i in range(0, 10 * count, 10)]
@@ -0,0 +1,71 @@
+"""
+Rendering of dotted document field names as SQLite JSON paths.
+
+Indexes and queries must render a field with exactly the same expression text
+for SQLite to match them, so all SQL that extracts document fields goes
+through these helpers. They are memoized since the same fields are rendered
+for every query of a given shape.
+"""
+import functools
+import re
+
+_PLAIN_KEY = re.compile(r"^[A-Za-z0-9_]+$")
+
+def sql_string(value: str) -> str:
+    """Render a Python string as a SQL string literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+def sql_identifier(name: str) -> str:
+    """Render a table, index, trigger or column name as a quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+@functools.lru_cache(maxsize=1024)
+def json_path(field: str) -> str:
+    """
+    Convert a dotted field name into a JSON path, e.g. ``profile.city`` -> ``$.profile.city``.
+    
+    Keys containing anything other than letters, digits and underscores are quoted.
+    """
+    parts = []
+    for part in field.split('.'):
+        if _PLAIN_KEY.match(part):
+            parts.append(part)
+        elif '"' in part:
+            raise ValueError(f"Invalid field name: {field!r}")
+        else:
+            parts.append(f'"{part}"')
+    return "$." + ".".join(parts)
+
+@functools.lru_cache(maxsize=1024)
+def sql_json_path(field: str) -> str:
+    """Render the JSON path of a field as a SQL string literal."""
+    return sql_string(json_path(field))
+
+@functools.lru_cache(maxsize=1024)
+def json_extract_sql(field: str, column: str = "data") -> str:
+    """Render the SQL expression extracting a field from a JSON column."""
+    return f"json_extract({column}, {sql_json_path(field)})"
+
+@functools.lru_cache(maxsize=1024)
+def json_update_path_sql(field: str, column: str = "data") -> str:
+    """
+    Render the SQL expression for the JSON path a field update writes to.
+    
+    Numeric components such as ``tags.0`` address an array element when the
+    parent value is an array and an object key otherwise, so each one is
+    resolved against the stored document with a CASE on ``json_type``.
+    """
+    path = "$"
+    expr = None
+    for part in field.split('.'):
+        if part.isdigit():
+            base = expr or sql_string(path)
+            expr = (f"(CASE json_type({column}, {base}) WHEN 'array' "
+                    f"THEN {base} || '[{part}]' ELSE {base} || '.{part}' END)")
+        else:
+            segment = json_path(part)[1:]
+            if expr:
+                expr = f"{expr} || {sql_string(segment)}"
+            else:
+                path += segment
+    return expr or sql_string(path)
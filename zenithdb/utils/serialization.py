@@ -0,0 +1,28 @@
+"""
+JSON (de)serialization for stored documents.
+
+Uses orjson when it is installed and falls back to the standard library json
+module otherwise. Documents are always encoded to ``str`` so SQLite stores them
+as TEXT, which its JSON functions require. Binding orjson's ``bytes`` output
+directly would store BLOBs, and converting them with ``CAST(? AS TEXT)`` in the
+statement is slower than the ``decode()`` of an already UTF-8 buffer.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> str:
+        """Serialize a document to a JSON string."""
+        return orjson.dumps(obj, option=_OPTIONS).decode()
+
+    loads = orjson.loads
+else:  # pragma: no cover - depends on the environment
+    dumps = json.dumps
+    loads = json.loads